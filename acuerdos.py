@@ -1,10 +1,11 @@
 import streamlit as st
-import pandas as pd
-import gspread
-from google.oauth2.service_account import Credentials
 import datetime
-import re
-from difflib import SequenceMatcher
+import hmac
+import os
+
+import tiempos
+
+tiempos.iniciar()
 
 # Configuración inicial de la app
 st.set_page_config(page_title="Acuerdos Aucca", layout="wide")
@@ -45,36 +46,6 @@ hr {
 """
 st.markdown(eco_css, unsafe_allow_html=True)
 
-def _approx_contains_text(value, ql: str, thr: float = 0.8) -> bool:
-    """Búsqueda aproximada tolerante a errores de tipeo."""
-    try:
-        import pandas as pd  # por si el módulo se evalúa en otro archivo
-    except Exception:
-        pass
-
-    s = "" if value is None else str(value)
-    s = s.lower()
-
-    # 1) Substring directo
-    if ql in s:
-        return True
-
-    # 2) Aproximación por tokens (palabras)
-    tokens = re.findall(r"\w+", s)
-    for t in tokens:
-        if SequenceMatcher(None, ql, t).ratio() >= thr:
-            return True
-
-    # 3) Aproximación por ventana deslizante (frases)
-    L = len(ql)
-    if L >= 4 and len(s) >= L:
-        for i in range(len(s) - L + 1):
-            frag = s[i:i+L]
-            if SequenceMatcher(None, ql, frag).ratio() >= thr:
-                return True
-
-    return False
-
 # Mostrar logo y cabecera
 top1, top2 = st.columns([2, 9])
 with top1:
@@ -85,25 +56,156 @@ with top2:
 st.caption("Corazón = Mente = Espíritu = Conciencia 👂🏾🧠🫀")
 # st.caption("Esta aplicación es una herramienta comunitaria para quienes habitamos el centro eco-pedagógico AUCCA")
 
-# Función para cargar datos desde Google Sheets
-def cargar_datos(sheet_name):
-    creds = Credentials.from_service_account_info(
-        st.secrets["gspread"],
-        scopes=[
-            "https://spreadsheets.google.com/feeds",
-            "https://www.googleapis.com/auth/drive"
-        ]
+# Hojas ya tipadas según su esquema (esquemas.py), una vez por versión de los datos
+@st.cache_data(max_entries=16)
+def _hoja_tipada(sheet_name, version, _df):
+    with tiempos.tramo("tipado"):
+        return esquemas.normalizar(sheet_name, _df)
+
+# Función para cargar datos desde Google Sheets (con caché compartida, ver datos.py).
+# Devuelve {hoja: (DataFrame, versión)}: la versión es la de esa misma copia, para que las
+# cachés de abajo nunca guarden datos viejos con la versión de una recarga más nueva
+def cargar_datos(sheet_names, crudas=()):
+    # Las hojas en `crudas` se entregan tal como vienen de la caché, sin tipar
+    with tiempos.tramo("carga"):
+        hojas = datos.cargar_hojas(sheet_names, copiar=False, con_version=True)
+    return {h: (df if h in crudas else _hoja_tipada(h, version, df), version) for h, (df, version) in hojas.items()}
+
+# Hojas que necesita cada sección; se descargan juntas en una sola llamada
+HOJAS_POR_SECCION = {
+    "Checklist de semanerx": ["tareas_semaneros", "estado_tareas"],
+    "Acuerdos de convivencia (internos)": ["acuerdos_internos"],
+    "Acuerdos Comunicación Externa": ["actuerdos_externos"],
+    "Links claves": ["links"],
+}
+
+def cargar_seccion(seccion, crudas=()):
+    return cargar_datos(HOJAS_POR_SECCION.get(seccion, []), crudas)
+
+# Filas de cada tema de una sección de acuerdos (ver documentos.agrupar), una vez por versión
+@st.cache_resource(max_entries=4)
+def _grupos(seccion, version, _df):
+    return documentos.agrupar(documentos.FUENTES[seccion], _df)
+
+def cargar_grupos(seccion):
+    hoja = documentos.FUENTES[seccion].hoja
+    df, version = cargar_seccion(seccion)[hoja]
+    return _grupos(seccion, version, df)
+
+# Acuerdos, links y tareas con una búsqueda común, solo para la búsqueda de la
+# portada; se arma una vez por versión de esas hojas
+@st.cache_resource(max_entries=4)
+def _documentos(version, _hojas):
+    return documentos.AlmacenDocumentos(_hojas)
+
+def cargar_documentos():
+    hojas = cargar_datos(documentos.HOJAS)
+    version = tuple(hojas[h][1] for h in documentos.HOJAS)
+    return _documentos(version, {h: df for h, (df, _) in hojas.items()})
+
+# Historial de estado_tareas separado por semana ISO; se conserva entre recargas y, si la
+# hoja solo creció, se tipan únicamente las filas nuevas
+@st.cache_resource
+def _particiones_estado():
+    return tareas.ParticionesEstado()
+
+# Avance máximo por (tarea, usuario, semana), una vez por versión de estado_tareas
+@st.cache_data(max_entries=4)
+def _avance_maximo(version, semana, _df_semana):
+    return tareas.avance_maximo(_df_semana)
+
+# Tablas y figuras del checklist. Se guardan por (versión de los datos, filtro), donde la
+# versión es la de tareas_semaneros y estado_tareas (ver _datos_checklist) y el filtro dice
+# qué registros se entregan (rango de fechas, semana, persona o tema); al llegar a
+# max_entries se descartan las usadas hace más tiempo
+@st.cache_data(max_entries=32)
+def _resumen_tema(version, filtro, _completadas, _df_tareas):
+    return tareas.resumen_por_tema(_completadas, _df_tareas)
+
+@st.cache_data(max_entries=32)
+def _detalle_tema(version, filtro, tema, _completadas, _df_tareas):
+    completadas_tema = _completadas[_completadas["Tema"] == tema].rename(columns={"Usuario": "Auccane"})
+    completadas_100 = completadas_tema[completadas_tema["Porcentaje"] == 100]
+    en_proceso = completadas_tema[(completadas_tema["Porcentaje"] > 0) & (completadas_tema["Porcentaje"] < 100)]
+    tareas_tema = _df_tareas[_df_tareas["Tema"] == tema]
+    pendientes_tema = tareas_tema[~tareas_tema["ID_tarea"].isin(completadas_100["ID_tarea"].unique())]
+    return completadas_tema, completadas_100, en_proceso, pendientes_tema
+
+@st.cache_data(max_entries=32)
+def _reporte_aucane(version, filtro, aucane, _completadas, _df_tareas):
+    return tareas.reporte_aucane(_completadas, _df_tareas, aucane)
+
+@st.cache_resource(max_entries=16)
+def _figura_100(version, filtro, _resumen_100):
+    import plotly.express as px
+    chart_data_100 = _resumen_100.reset_index()
+    fig_100 = px.bar(
+        chart_data_100,
+        x="Tema",
+        y="% completado",
+        text=chart_data_100["% completado"].astype(str) + "%",
+        color_discrete_sequence=["#4C9A2A"],
+        hover_data={"Total": True, "% completado": True, "Completadas": True},
+        labels={"% completado": "% Completado"},
+        title="✅ Tareas completadas (100%) por tema"
     )
-    client = gspread.authorize(creds)
-    sh = client.open_by_key("1C8njkp0RQMdXnxuJvPvfK_pNZHQSi7q7dUPeUg-2624")
-    worksheet = sh.worksheet(sheet_name)
-    data = worksheet.get_all_records()
-    return pd.DataFrame(data)
-
-# Botón para borrar la caché
-if st.button("Actualizar Base de datos"):
-    st.cache_data.clear()
-    st.success("Caché borrada correctamente. La base de datos está actualizada")
+    fig_100.update_traces(textposition='outside')
+    fig_100.update_layout(yaxis_range=[0, 100])
+    return fig_100
+
+@st.cache_resource(max_entries=16)
+def _figura_aucane(version, filtro, aucane, _resumen_aucane):
+    import plotly.express as px
+    return px.pie(
+        _resumen_aucane,
+        names="Tema",
+        values="Tareas completadas",
+        title=f"Distribución de aportes de {aucane} por tema",
+        color_discrete_sequence=["#4C9A2A"]
+    )
+
+# Tendencias de varias semanas: salen del cubo de aportes (conteos por semana, tema,
+# persona y tramo), así que no dependen de cuántos registros haya en esas semanas
+@st.cache_data(max_entries=16)
+def _tendencias(version, semanas, usuario, _particiones, _df_tareas):
+    aportes = _particiones.aportes(tareas.lunes_semana(semanas[0]), tareas.lunes_semana(semanas[-1]))
+    return (tareas.aportes_por_semana(aportes, list(semanas), usuario),
+            tareas.tasa_por_tema(aportes, _df_tareas, list(semanas)))
+
+@st.cache_resource(max_entries=16)
+def _figura_tendencia(version, filtro, titulo, eje, _tabla, colores=None):
+    import plotly.express as px
+    fig = px.line(
+        _tabla,
+        markers=True,
+        title=titulo,
+        labels={"value": eje, "variable": ""},
+        color_discrete_sequence=colores,
+    )
+    fig.update_layout(legend_title_text="")
+    return fig
+
+# Textos de búsqueda de los links: se arman una sola vez por versión de los datos, solo
+# con las columnas de texto de la hoja (no las derivadas como Año_int, Fecha_dt o Dominio)
+@st.cache_resource(max_entries=4)
+def _textos_links(version, _df):
+    columnas = esquemas.ESQUEMAS["links"].texto
+    return busqueda.TextosBusqueda(_df[columnas].itertuples(index=False, name=None))
+
+# Rango de cada link en el orden por defecto (más nuevo primero): ordena los resultados
+# sin búsqueda y desempata los de igual relevancia sin volver a ordenar la tabla
+@st.cache_resource(max_entries=4)
+def _orden_links(version, _df):
+    import numpy as np
+    orden = _df.reset_index(drop=True).sort_values(
+        ["Fecha_dt", "Año_int", "Nombre"], ascending=[False, False, True], na_position="last"
+    ).index.to_numpy()
+    rango = np.empty(len(orden), dtype=np.int64)
+    rango[orden] = np.arange(len(orden))
+    return rango
+
+# Botón para volver a descargar las hojas (solo las de la sección abierta, ver más abajo)
+actualizar = st.button("Actualizar Base de datos")
 
 # Navegación principal sin sidebar
 seccion = st.selectbox("🌿 Explorar secciones", [
@@ -113,6 +215,25 @@ seccion = st.selectbox("🌿 Explorar secciones", [
     "Acuerdos Comunicación Externa",
     "Links claves"
 ])
+tiempos.etiquetar(seccion or "portada")
+
+# Las dependencias pesadas se importan solo cuando una sección las usa: la portada no
+# carga pandas, gspread ni plotly (ver arranque.py para medir cuánto cuesta cada una)
+if seccion:
+    import pandas as pd
+
+    import datos
+    import documentos
+    import esquemas
+    import tareas
+
+# Se descartan solo las hojas de la sección abierta (en la portada, todas): las demás
+# siguen en caché y no se vuelven a pedir a Google
+if actualizar:
+    import datos
+    for hoja in HOJAS_POR_SECCION.get(seccion) or [None]:
+        datos.invalidar(hoja)
+    st.success("Caché borrada correctamente. La base de datos está actualizada")
 
 if seccion == "":
     colq1, colq2 = st.columns([1, 10])
@@ -130,83 +251,41 @@ if seccion == "":
         Usa los menús desplegables arriba para explorar cada sección. 🌱
         """)
 
+    # Búsqueda en todas las secciones a la vez; las hojas (y pandas) se cargan solo al buscar
+    consulta = st.text_input("🔎 Buscar en todas las secciones", placeholder="Acuerdo, link o tarea...")
+    if consulta:
+        import datos
+        import documentos
+        import esquemas
+        import tareas
+
+        almacen = cargar_documentos()
+        with tiempos.tramo("busqueda"):
+            resultados, conteos = almacen.buscar(consulta)
+        if not conteos:
+            st.info("No hay resultados para esa búsqueda.")
+        else:
+            st.caption(" · ".join(f"{s}: {conteos[s]}" for s in documentos.FUENTES if s in conteos))
+            for seccion_doc in (s for s in documentos.FUENTES if s in conteos):
+                docs = resultados[seccion_doc]
+                with st.expander(f"{seccion_doc} ({conteos[seccion_doc]})", expanded=True):
+                    for doc in docs:
+                        titulo = f"[{doc['titulo']}]({doc['url']})" if doc["url"] else doc["titulo"]
+                        st.markdown(f"**{doc['grupo']}** · {titulo}: {doc['texto']}")
+                    if conteos[seccion_doc] > len(docs):
+                        st.caption(f"Se muestran los {len(docs)} más parecidos; abre la sección para ver el resto.")
+
 
 elif seccion == "Links claves":
     # --- mejoras de UI/UX para links claves ---
     import datetime
-    from urllib.parse import urlparse
-
-    df = cargar_datos("links")
-
-    # Normalizar nombres de columnas (acepta variaciones)
-    rename_map = {
-        "Petalo": "Pétalo", "Pétalo": "Pétalo",
-        "Tema": "Tema",
-        "Detalle": "Detalle",
-        "Tipo": "Tipo",
-        "Fecha creación": "Fecha creación", "Fecha creacion": "Fecha creación",
-        "Año": "Año", "Anio": "Año",
-        "Nombre": "Nombre",
-        "Descripción": "Descripción", "Descripcion": "Descripción",
-        "url": "URL", "Url": "URL", "URL": "URL",
-    }
-    df = df.rename(columns={k: v for k, v in rename_map.items() if k in df.columns})
-
-    # Asegurar columnas esperadas
-    expected_cols = ["Pétalo","Tema","Detalle","Tipo","Fecha creación","Año","Nombre","Descripción","URL"]
-    for c in expected_cols:
-        if c not in df.columns:
-            df[c] = ""
-
-    # Limpieza básica
-    for c in expected_cols:
-        df[c] = df[c].astype(str).str.strip()
-
-    # Unificar formato de Pétalo
-    df["Pétalo"] = df["Pétalo"].str.title()
-
-    # Parseo de Año
-    def _to_int(x):
-        try:
-            return int(float(str(x).strip()))
-        except:
-            return None
-    df["Año_int"] = df["Año"].apply(_to_int)
-
-    # Parseo de "Fecha creación" con meses en español (p.ej., "25 julio 2025")
-    meses = {
-        "enero":1,"febrero":2,"marzo":3,"abril":4,"mayo":5,"junio":6,
-        "julio":7,"agosto":8,"septiembre":9,"setiembre":9,"octubre":10,
-        "noviembre":11,"diciembre":12,
-    }
-    def _parse_fecha_es(s):
-        s = str(s).strip().lower()
-        if not s:
-            return None
-        parts = s.replace("de ", "").split()
-        # Formatos típicos: "25 julio 2025" / "2 marzo 2025"
-        try:
-            if len(parts) >= 3:
-                d = int(parts[0]); m = meses.get(parts[1]); y = int(parts[2])
-                if m:
-                    return datetime.datetime(y, m, d)
-        except:
-            pass
-        return None
-
-    df["Fecha_dt"] = df["Fecha creación"].apply(_parse_fecha_es)
-    # Si no hay fecha, usar 1-enero del año (si existe)
-    faltan_fecha = df["Fecha_dt"].isna() & df["Año_int"].notna()
-    df.loc[faltan_fecha, "Fecha_dt"] = df.loc[faltan_fecha, "Año_int"].apply(lambda y: datetime.datetime(y,1,1))
-
-    # Dominio del enlace (estético/informativo)
-    def _domain(u):
-        try:
-            d = urlparse(u).netloc
-            return d.replace("www.", "")
-        except:
-            return ""
-    df["Dominio"] = df["URL"].apply(_domain)
+
+    import numpy as np
+
+    import busqueda
+
+    # Columnas normalizadas y derivadas (Año_int, Fecha_dt, Dominio) según esquemas.py
+    df, version_links = cargar_seccion(seccion)["links"]
 
     st.subheader("🔗 Links claves")
 
@@ -230,35 +309,76 @@ elif seccion == "Links claves":
         anos_opts = sorted([int(x) for x in df["Año_int"].dropna().unique()], reverse=True)
         f_anos = st.multiselect("Año", anos_opts, default=[])
 
-    # Aplicar filtros
-    dff = df.copy()
-    if q:
-        ql = q.strip().lower()
-        # Busca en TODAS las columnas con aproximación
-        mask = dff.apply(lambda row: any(_approx_contains_text(v, ql) for v in row.values), axis=1)
-        dff = dff[mask]
-
-
-    if f_petalo != "(Todos)":
-        dff = dff[dff["Pétalo"] == f_petalo]
-    if f_tema != "(Todos)":
-        dff = dff[dff["Tema"] == f_tema]
-    if f_tipos:
-        dff = dff[dff["Tipo"].isin(f_tipos)]
-    if f_anos:
-        dff = dff[dff["Año_int"].isin(f_anos)]
+    # Con búsqueda se muestran solo los más relevantes
+    MAX_RESULTADOS = 120
 
-    # Orden: primero por fecha (más nuevo), luego por año, luego por nombre
-    dff = dff.sort_values(["Fecha_dt", "Año_int", "Nombre"], ascending=[False, False, True], na_position="last")
+    # Aplicar filtros (como máscara, para que la búsqueda solo puntúe esas filas)
+    with tiempos.tramo("filtros"):
+        mascara = np.ones(len(df), dtype=bool)
+        if f_petalo != "(Todos)":
+            mascara &= (df["Pétalo"] == f_petalo).to_numpy()
+        if f_tema != "(Todos)":
+            mascara &= (df["Tema"] == f_tema).to_numpy()
+        if f_tipos:
+            mascara &= df["Tipo"].isin(f_tipos).to_numpy()
+        if f_anos:
+            mascara &= df["Año_int"].isin(f_anos).to_numpy()
+        orden = _orden_links(version_links, df)
+
+    ql = q.strip().lower() if q else ""
+    if ql:
+        # Busca en las columnas de texto con aproximación (solo entre las filas filtradas)
+        # y se queda con las más parecidas; a igual puntaje, la más nueva primero
+        with tiempos.tramo("textos"):
+            textos = _textos_links(version_links, df)
+        with tiempos.tramo("busqueda"):
+            ranking = textos.mejores(ql, MAX_RESULTADOS, desempate=orden, permitidas=mascara)
+            dff = df.iloc[[i for i, _ in ranking]].assign(Relevancia=[p for _, p in ranking])
+    else:
+        with tiempos.tramo("filtros"):
+            # Orden: primero por fecha (más nuevo), luego por año, luego por nombre
+            posiciones = np.flatnonzero(mascara)
+            dff = df.iloc[posiciones[np.argsort(orden[posiciones], kind="stable")]]
 
     ver_todo = st.checkbox("📋 Ver todos (agrupados por Tema)", value=False)
 
+    # Paginación: cuántas tarjetas se dibujan como máximo en cada recarga
+    TARJETAS_POR_PAGINA = 30
+    MAX_TARJETAS = 60  # sumando todos los temas abiertos en la vista agrupada
+    firma_filtros = (q, f_petalo, f_tema, tuple(f_tipos), tuple(f_anos))
+
+    def _pagina_actual(clave, total, por_pagina):
+        # Cursor guardado en la sesión; vuelve a la primera página si cambian los filtros
+        estado = st.session_state.setdefault(clave, {"firma": None, "pagina": 0})
+        if estado["firma"] != firma_filtros:
+            estado.update(firma=firma_filtros, pagina=0)
+        paginas = max(1, -(-total // por_pagina))
+        estado["pagina"] = min(estado["pagina"], paginas - 1)
+        return estado["pagina"], paginas
+
+    def _mover_pagina(clave, paso):
+        st.session_state[clave]["pagina"] += paso
+
+    def _navegacion(clave, pagina, paginas):
+        if paginas <= 1:
+            return
+        n1, n2, n3 = st.columns([2, 3, 2])
+        with n1:
+            st.button("◀ Anterior", key=f"{clave}_ant", disabled=pagina == 0,
+                      on_click=_mover_pagina, args=(clave, -1), width="stretch")
+        with n2:
+            st.caption(f"Página {pagina + 1} de {paginas}")
+        with n3:
+            st.button("Siguiente ▶", key=f"{clave}_sig", disabled=pagina >= paginas - 1,
+                      on_click=_mover_pagina, args=(clave, 1), width="stretch")
+
     # —— Render helpers (definidos aquí para mantener el bloque autocontenible)
-    def _link_button(label, url):
-        # Usa link_button si está disponible; si no, link normal
+    def _link_button(label, url, key):
+        # link_button acepta `key` desde Streamlit 1.56 (ver requirements.txt); con una
+        # versión anterior queda un link normal
         try:
-            st.link_button(label, url, use_container_width=True)
-        except Exception:
+            st.link_button(label, url, key=key, width="stretch")
+        except TypeError:
             st.markdown(f"[{label}]({url})")
 
     def _render_card(row):
@@ -270,7 +390,7 @@ elif seccion == "Links claves":
         anio = row["Año"] or ""
         dominio = row["Dominio"] or ""
         fecha_txt = ""
-        if isinstance(row["Fecha_dt"], datetime.datetime):
+        if pd.notna(row["Fecha_dt"]):
             fecha_txt = row["Fecha_dt"].strftime("Creado el %d-%m-%Y")
 
         st.markdown(f"#### {nombre}")
@@ -280,14 +400,14 @@ elif seccion == "Links claves":
         if row["Descripción"]:
             st.markdown(row["Descripción"])
         if row["URL"]:
-            _link_button("Abrir enlace", row["URL"])
+            _link_button("Abrir enlace", row["URL"], key=f"link_{row.name}")
             if dominio:
                 st.caption(f"🌐 {dominio}")
         else:
-            st.button("Sin URL", disabled=True, use_container_width=True)
+            st.button("Sin URL", disabled=True, key=f"sin_url_{row.name}", use_container_width=True)
 
     def _render_cards_grid(gdf):
-        gdf = gdf.reset_index(drop=True)
+        # Se conserva el índice original: da claves únicas a los botones de cada tarjeta
         for i in range(0, len(gdf), 3):
             cols = st.columns(3)
             for j, col in enumerate(cols):
@@ -296,16 +416,40 @@ elif seccion == "Links claves":
                 with col:
                     _render_card(gdf.iloc[i + j])
 
-    # —— Mostrar resultados
-    if dff.empty:
-        st.info("No hay enlaces que coincidan con los filtros.")
-    else:
-        if ver_todo:
-            for tema_val, grupo in dff.groupby("Tema"):
-                st.subheader(f"🔸 {tema_val or '(Sin tema)'}")
-                _render_cards_grid(grupo)
+    # —— Mostrar resultados (solo se dibuja la página visible de cada lista)
+    with tiempos.tramo("tarjetas"):
+        if dff.empty:
+            st.info("No hay enlaces que coincidan con los filtros.")
         else:
-            _render_cards_grid(dff.head(60))  # límite razonable para evitar scroll infinito
+            if ver_todo:
+                # Posiciones de cada tema dentro de dff; un tema se dibuja solo si se abre
+                grupos = dff.groupby("Tema").indices
+                restantes = MAX_TARJETAS
+                for tema_val in sorted(grupos):
+                    posiciones = grupos[tema_val]
+                    abierto = st.checkbox(f"🔸 {tema_val or '(Sin tema)'} ({len(posiciones)})", key=f"links_tema_{tema_val}")
+                    if not abierto:
+                        continue
+                    if restantes <= 0:
+                        st.caption("Hay demasiados temas abiertos: cierra alguno para ver estos enlaces.")
+                        continue
+                    clave = f"links_pagina_{tema_val}"
+                    por_pagina = min(TARJETAS_POR_PAGINA, restantes)
+                    pagina, paginas = _pagina_actual(clave, len(posiciones), por_pagina)
+                    visibles = posiciones[pagina * por_pagina:(pagina + 1) * por_pagina]
+                    _render_cards_grid(dff.iloc[visibles])
+                    restantes -= len(visibles)
+                    _navegacion(clave, pagina, paginas)
+            else:
+                pagina, paginas = _pagina_actual("links_pagina", len(dff), TARJETAS_POR_PAGINA)
+                inicio = pagina * TARJETAS_POR_PAGINA
+                fin = min(inicio + TARJETAS_POR_PAGINA, len(dff))
+                if ql and len(dff) == MAX_RESULTADOS:
+                    st.caption(f"Mostrando {inicio + 1}–{fin} de los {len(dff)} enlaces más parecidos a la búsqueda")
+                else:
+                    st.caption(f"Mostrando {inicio + 1}–{fin} de {len(dff)} enlaces")
+                _render_cards_grid(dff.iloc[inicio:fin])
+                _navegacion("links_pagina", pagina, paginas)
 
 
 
@@ -328,46 +472,30 @@ elif seccion == "Links claves":
 
 
 elif seccion == "Acuerdos de convivencia (internos)":
-    df = cargar_datos("acuerdos_internos")
-    df = df.rename(columns={
-        "Tema": "Tema",
-        "Orden": "Número de orden",
-        "Acuerdo": "Acuerdo"
-    })
-    temas = df['Tema'].unique()
+    # Acuerdos de cada tema, ya ordenados por número (se agrupan una vez por versión)
+    grupos = cargar_grupos(seccion)
     ver_todo = st.checkbox("Ver todos los acuerdos por tema")
 
     if ver_todo:
-        for tema in temas:
-            subset = df[df['Tema'] == tema].sort_values("Número de orden")
+        for tema, subset in grupos.items():
             with st.expander(f"🟢 {tema}", expanded=False):
                 for _, row in subset.iterrows():
                     st.markdown(f"{row['Número de orden']}. {row['Acuerdo']}")
     else:
-        tema = st.selectbox("Selecciona un tema:", [""] + list(temas))
+        tema = st.selectbox("Selecciona un tema:", [""] + list(grupos))
         if tema:
-            subset = df[df['Tema'] == tema].sort_values("Número de orden")
+            subset = grupos[tema]
             st.subheader(f"🟢 {tema}")
             for _, row in subset.iterrows():
                 st.markdown(f"{row['Número de orden']}. {row['Acuerdo']}")
 
 elif seccion == "Acuerdos Comunicación Externa":
-    df = cargar_datos("actuerdos_externos")
-    df = df.rename(columns={
-        "Acuerdo": "Tipo de acuerdo",
-        "Aspecto": "Aspecto específico",
-        "Detalle": "Detalle del acuerdo"
-    })
-    tipos = df['Tipo de acuerdo'].unique()
-    tipo = st.selectbox("Selecciona un tipo de acuerdo:", [""] + list(tipos))
+    grupos = cargar_grupos(seccion)
+    tipo = st.selectbox("Selecciona un tipo de acuerdo:", [""] + list(grupos))
     if tipo:
-        subset = df[df['Tipo de acuerdo'] == tipo]
-        for _, row in subset.iterrows():
+        for _, row in grupos[tipo].iterrows():
             st.markdown(f"#### {row['Aspecto específico']}")
             st.markdown(f"{row['Detalle del acuerdo']}")
-    for _, row in subset.iterrows():
-        st.markdown(f"#### {row['Aspecto específico']}")
-        st.markdown(f"{row['Detalle del acuerdo']}")
 
 
 elif seccion == "Checklist de semanerx":
@@ -395,86 +523,109 @@ elif seccion == "Checklist de semanerx":
 
     semaneros = ["Chalo", "Camilú", "Niko", "Diego", "Francis", "Tais", "Cala"]
     nombre = st.selectbox("Selecciona tu nombre:", [""] + semaneros)
-    df_tareas = cargar_datos("tareas_semaneros")
+    if "registro_reciente" in st.session_state:
+        st.success(f"✅ Tarea registrada: {st.session_state.pop('registro_reciente')}")
 
+    # Los paneles de abajo son fragmentos: al tocar un widget se vuelve a ejecutar solo
+    # ese panel, que toma sus datos de la caché (no se vuelve a descargar nada)
+    def _datos_checklist():
+        try:
+            hojas = cargar_seccion("Checklist de semanerx", crudas=("tareas_semaneros", "estado_tareas"))
+        except Exception:
+            # Si falla el lote (p.ej. no existe estado_tareas), al menos cargar las tareas
+            hojas = cargar_datos(["tareas_semaneros"])
+
+        # estado_tareas queda tipado (fechas, semana ISO, porcentaje entero) y por semana
+        particiones = _particiones_estado()
+        df_estado, version_estado = hojas.get("estado_tareas", (None, None))
+        df_tareas, version_tareas = hojas["tareas_semaneros"]
+        if df_estado is not None:
+            # Los IDs de la hoja solo sirven si las dos hojas los tienen; si no, crc32
+            usar_id = tareas.ids_de_hoja(df_tareas.columns, df_estado.columns)
+            df_tareas = _hoja_tipada("tareas_semaneros", version_tareas, df_tareas)
+            if not usar_id:
+                df_tareas = df_tareas.assign(ID_tarea=tareas.ids_tarea(df_tareas, usar_id=False))
+            # Si la hoja solo creció (lectura incremental o registro optimista) se tipa la cola;
+            # si la copia ya se reemplazó no hay meta y se revisa entera
+            meta = datos.meta_hoja("estado_tareas", version_estado)
+            with tiempos.tramo("particiones"):
+                particiones.actualizar(df_estado, version_estado,
+                                       completa=not (meta and (meta["incrementales"] or meta.get("optimistas"))),
+                                       usar_id=usar_id)
+        return df_tareas, particiones, (version_tareas, version_estado)
+
+    @st.fragment
+    def _editor_tarea(row, nombre):
+        tarea_id = row.tarea_id
+        completada = st.checkbox(row.etiqueta, key=tarea_id)
+
+        if completada:
+            st.markdown(f"#### {row.Zona}: {row.Tarea}")
+            with st.expander("✏️ Completa los detalles para esta tarea:", expanded=True):
+                porcentaje = st.slider("¿Cuánto se completó esta tarea?", min_value=0, max_value=100, value=100, step=10, key=f"porc_{tarea_id}")
+                observacion = st.text_area("Observaciones", key=f"obs_{tarea_id}")
+                registrar = st.button("Registrar", key=f"btn_{tarea_id}")
+
+            if registrar:
+                estado = "Sí" if porcentaje == 100 else "En proceso"
+                # Se encola y se envía en segundo plano (no bloquea la app); mientras tanto
+                # se agrega a la copia en caché, así pendientes y resúmenes ya lo cuentan.
+                # Sin ID_tarea en las dos hojas, la columna queda vacía (se lee como crc32)
+                registro = {
+                    "Fecha": datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
+                    "Usuario": nombre,
+                    "Tema": row.Tema,
+                    "Zona": row.Zona,
+                    "Tarea": row.Tarea,
+                    "Completada": estado,
+                    "Porcentaje": porcentaje,
+                    "Observaciones": observacion,
+                    "ID_tarea": row.ID_tarea if _particiones_estado().usar_id else "",
+                }
+                id_registro = datos.registrar_fila(
+                    "estado_tareas", tareas.fila_registro(registro, _particiones_estado().columnas)
+                )
+                descripcion = f"{row.Zona} - {row.Tarea} ({estado}, {porcentaje}%)"
+                st.session_state.setdefault("registros", []).append((id_registro, descripcion))
+                st.session_state["registro_reciente"] = descripcion
+                # Toda la página: la tarea sale de pendientes y entra en los resúmenes
+                st.rerun(scope="app")
 
-    try:
-        df_estado = cargar_datos("estado_tareas")
-        if df_estado.empty:
-            df_estado = pd.DataFrame(columns=["Fecha", "Usuario", "Tema", "Zona", "Tarea", "Completada"])
-        else:
-            df_estado.columns = [col.strip() for col in df_estado.columns]
-    except:
-        df_estado = pd.DataFrame(columns=["Fecha", "Usuario", "Tema", "Zona", "Tarea", "Completada"])
+    df_tareas, particiones, version = _datos_checklist()
 
     hoy = datetime.datetime.now()
-    semana_actual = hoy.isocalendar()[1]
-    df_estado["Semana"] = pd.to_datetime(df_estado["Fecha"], format='%Y-%m-%d %H:%M')\
-    .dt.isocalendar().week
+    # Registros de esta semana (año y semana ISO): solo se lee su partición
+    estado_semana = particiones.semana(hoy)
 
-    tareas_realizadas = df_estado[df_estado["Semana"] == semana_actual]["Tarea"].tolist()
+    tareas_realizadas = estado_semana["Tarea"].tolist()
     
     if nombre:
-        # Convertir Porcentaje a numérico y filtrar tareas completadas al 100%
-        df_estado["Porcentaje"] = pd.to_numeric(df_estado.get("Porcentaje", 0), errors="coerce").fillna(0).astype(int)
-        completadas_100 = df_estado[
-            (df_estado["Semana"] == semana_actual) & 
-            (df_estado["Porcentaje"] == 100)
-        ]["Tarea"].unique().tolist()
+        # Tareas completadas al 100% esta semana (por ID, no por el texto de la tarea)
+        completadas_100 = estado_semana.loc[estado_semana["Porcentaje"] == 100, "ID_tarea"].unique()
     
         # Mostrar solo tareas que no han sido completadas al 100%
-        df_pendientes = df_tareas[~df_tareas["Tarea"].isin(completadas_100)]
-    
-        for tema in df_pendientes["Tema"].unique():
-            st.markdown(f"### 🌱 {tema}")
-            subtareas = df_pendientes[df_pendientes["Tema"] == tema]
-    
-            for _, row in subtareas.iterrows():
-                tarea_id = f"{row['Zona']} - {row['Tarea']}"
-                registro_previo = df_estado[
-                    (df_estado["Tarea"] == row["Tarea"]) & 
-                    (df_estado["Semana"] == semana_actual) &
-                    (df_estado["Usuario"] == nombre)
-                ]
-                porcentaje_prev = registro_previo["Porcentaje"].max() if not registro_previo.empty else 0
+        df_pendientes = df_tareas[~df_tareas["ID_tarea"].isin(completadas_100)]
+        # Ids de los widgets, etiquetas y avance previo calculados de una vez
+        with tiempos.tramo("checklist"):
+            avance = _avance_maximo(version[1], tareas.clave_semana(hoy), estado_semana)
+            checklist = tareas.preparar_checklist(df_pendientes, avance, nombre, tareas.clave_semana(hoy))
     
-                label_text = f"**{row['Zona']}**: {row['Tarea']}"
-                if 0 < porcentaje_prev < 100:
-                    label_text += f" (Avance: {porcentaje_prev}%)"
-    
-                completada = st.checkbox(label_text, key=tarea_id)
-    
-                if completada:
-                    st.markdown(f"#### {row['Zona']}: {row['Tarea']}")
-                    with st.expander("✏️ Completa los detalles para esta tarea:", expanded=True):
-                        porcentaje = st.slider("¿Cuánto se completó esta tarea?", min_value=0, max_value=100, value=100, step=10, key=f"porc_{tarea_id}")
-                        observacion = st.text_area("Observaciones", key=f"obs_{tarea_id}")
-                        registrar = st.button("Registrar", key=f"btn_{tarea_id}")
-    
-                    if registrar:
-                        estado = "Sí" if porcentaje == 100 else "En proceso"
-                        creds = Credentials.from_service_account_info(
-                            st.secrets["gspread"],
-                            scopes=[
-                                "https://spreadsheets.google.com/feeds",
-                                "https://www.googleapis.com/auth/drive"
-                            ]
-                        )
-                        client = gspread.authorize(creds)
-                        sh = client.open_by_key("1C8njkp0RQMdXnxuJvPvfK_pNZHQSi7q7dUPeUg-2624")
-                        worksheet = sh.worksheet("estado_tareas")
-                        worksheet.append_row([
-                            hoy.strftime("%Y-%m-%d %H:%M"),
-                            nombre,
-                            row["Tema"],
-                            row["Zona"],
-                            row["Tarea"],
-                            estado,
-                            porcentaje,
-                            observacion
-                        ])
-                        st.success(f"✅ Tarea registrada: {row['Zona']} - {row['Tarea']} ({estado}, {porcentaje}%)")
-
+        with tiempos.tramo("widgets"):
+            for tema, subtareas in checklist.groupby("Tema", sort=False, observed=True):
+                st.markdown(f"### 🌱 {tema}")
+
+                for row in subtareas.itertuples(index=False):
+                    _editor_tarea(row, nombre)
+
+        # Estado de los registros de esta sesión (pendiente hasta que Google confirma)
+        if st.session_state.get("registros"):
+            cola = datos.cola_escritura("estado_tareas")
+            iconos = {cola.PENDIENTE: "⏳ Pendiente", cola.CONFIRMADO: "✅ Guardado", cola.ERROR: "⚠️ Error"}
+            with st.expander(f"📤 Tus registros ({cola.pendientes()} en cola)"):
+                for id_registro, descripcion in reversed(st.session_state["registros"][-10:]):
+                    st.caption(f"{iconos.get(cola.estado(id_registro), '⏳ Pendiente')} · {descripcion}")
+                    if cola.estado(id_registro) == cola.ERROR:
+                        st.caption(f"↳ {cola.error(id_registro)}")
         
    
         
@@ -483,102 +634,71 @@ elif seccion == "Checklist de semanerx":
     st.markdown("---")
     st.subheader("Resumen de tareas completadas por tema (esta semana)")
 
-    # Calcular resumen antes de usarlo
-    completadas = df_estado[(pd.to_datetime(df_estado["Fecha"], format='%Y-%m-%d %H:%M') >= fecha_inicio) & (pd.to_datetime(df_estado["Fecha"], format='%Y-%m-%d %H:%M') <= fecha_fin)]
-    resumen_tema = completadas.groupby("Tema")["Tarea"].count()
-    total_por_tema = df_tareas.groupby("Tema")["Tarea"].count()
-    resumen = pd.DataFrame({
-        "Completadas": resumen_tema,
-        "Total": total_por_tema
-    }).fillna(0).astype(int)
-    resumen["% completado"] = ((resumen["Completadas"] / resumen["Total"]) * 100).round(1).astype(str) + "%"
-
-    # Mostrar selector ahora que resumen está definido
-    tema_seleccionado = st.selectbox("🔍 Selecciona un tema para ver detalles:", [""] + resumen.index.tolist())
-    if tema_seleccionado:
-        tareas_tema = df_tareas[df_tareas["Tema"] == tema_seleccionado]
-        completadas_tema = completadas[completadas["Tema"] == tema_seleccionado]
-
-        st.markdown("#### Tareas realizadas:")
-        if 'completadas_tema' in locals():
-            completadas_tema = completadas_tema.rename(columns={"Usuario": "Auccane"})
-            st.dataframe(completadas_tema[["Zona", "Tarea", "Porcentaje","Auccane", "Observaciones","Fecha"]].sort_values("Fecha", ascending=False))
-
-        else:
-            st.info("Selecciona un tema para ver tareas completadas y pendientes.")
-        
-        # Convertir Porcentaje a número y renombrar columna Usuario → Auccane
-        completadas_tema["Porcentaje"] = pd.to_numeric(completadas_tema["Porcentaje"], errors="coerce").fillna(0).astype(int)
-        completadas_tema = completadas_tema.rename(columns={"Usuario": "Auccane"})
-        
-        # Dividir tareas completadas (100%) y en proceso
-        completadas_100 = completadas_tema[completadas_tema["Porcentaje"] == 100]
-        en_proceso = completadas_tema[(completadas_tema["Porcentaje"] > 0) & (completadas_tema["Porcentaje"] < 100)]
-        
-        # Mostrar tareas completadas
-        if not completadas_100.empty:
-            st.markdown("#### Tareas completadas (100%)")
-            st.dataframe(
-                completadas_100[["Zona","Fecha","Tarea","Auccane","Observaciones"]]
-                .sort_values("Fecha", ascending=False)
-                .style.set_properties(subset=["Observaciones"], **{"white-space": "pre-wrap"})
-            )
-        
-        # Mostrar tareas en proceso
-        if not en_proceso.empty:
-            st.markdown("#### Tareas comenzadas pero no finalizadas")
-            st.dataframe(
-                en_proceso[["Fecha", "Auccane", "Zona", "Tarea", "Porcentaje", "Observaciones"]]
-                .sort_values("Fecha", ascending=False)
-                .style.set_properties(subset=["Observaciones"], **{"white-space": "pre-wrap"})
+    @st.fragment
+    def _panel_resumen(fecha_inicio, fecha_fin):
+        df_tareas, particiones, version = _datos_checklist()
+
+        # Calcular resumen antes de usarlo
+        rango = ("rango", fecha_inicio, fecha_fin)
+        completadas = particiones.rango(fecha_inicio, fecha_fin)
+        resumen = _resumen_tema(version, rango, completadas, df_tareas)
+        resumen["% completado"] = resumen["% completado"].astype(str) + "%"
+
+        # Mostrar selector ahora que resumen está definido
+        tema_seleccionado = st.selectbox("🔍 Selecciona un tema para ver detalles:", [""] + resumen.index.tolist())
+        if tema_seleccionado:
+            completadas_tema, completadas_100, en_proceso, pendientes_tema = _detalle_tema(
+                version, rango, tema_seleccionado, completadas, df_tareas
             )
-        
-        # Filtrar tareas que no han sido registradas
-        realizadas = completadas_100["Tarea"].unique().tolist()
-        pendientes_tema = tareas_tema[~tareas_tema["Tarea"].isin(realizadas)]
-        
-        # Mostrar tareas pendientes
-        st.markdown("#### Tareas pendientes")
-        st.dataframe(pendientes_tema[["Zona", "Tarea"]].reset_index(drop=True))
 
+            st.markdown("#### Tareas realizadas:")
+            if 'completadas_tema' in locals():
+                st.dataframe(completadas_tema[["Zona", "Tarea", "Porcentaje","Auccane", "Observaciones","Fecha"]].sort_values("Fecha", ascending=False).reset_index(drop=True))
 
+            else:
+                st.info("Selecciona un tema para ver tareas completadas y pendientes.")
+
+            # Mostrar tareas completadas
+            if not completadas_100.empty:
+                st.markdown("#### Tareas completadas (100%)")
+                st.dataframe(
+                    completadas_100[["Zona","Fecha","Tarea","Auccane","Observaciones"]]
+                    .sort_values("Fecha", ascending=False)
+                    .reset_index(drop=True)
+                    .style.set_properties(subset=["Observaciones"], **{"white-space": "pre-wrap"})
+                )
 
-    import plotly.express as px
-    # Convertir Porcentaje a número
-    completadas = df_estado[
-        (pd.to_datetime(df_estado["Fecha"], format='%Y-%m-%d %H:%M') >= fecha_inicio) &
-        (pd.to_datetime(df_estado["Fecha"], format='%Y-%m-%d %H:%M') <= fecha_fin)
-    ]
-    completadas["Porcentaje"] = pd.to_numeric(completadas["Porcentaje"], errors="coerce").fillna(0).astype(int)
-    
+            # Mostrar tareas en proceso
+            if not en_proceso.empty:
+                st.markdown("#### Tareas comenzadas pero no finalizadas")
+                st.dataframe(
+                    en_proceso[["Fecha", "Auccane", "Zona", "Tarea", "Porcentaje", "Observaciones"]]
+                    .sort_values("Fecha", ascending=False)
+                    .reset_index(drop=True)
+                    .style.set_properties(subset=["Observaciones"], **{"white-space": "pre-wrap"})
+                )
+
+            # Mostrar tareas pendientes
+            st.markdown("#### Tareas pendientes")
+            st.dataframe(pendientes_tema[["Zona", "Tarea"]].reset_index(drop=True))
+
+    with tiempos.tramo("resumen"):
+        _panel_resumen(fecha_inicio, fecha_fin)
+
+    completadas = particiones.rango(fecha_inicio, fecha_fin)
+    # `completadas` ya tiene los registros del rango elegido, con Porcentaje entero
     completadas_100 = completadas[completadas["Porcentaje"] == 100]
     completadas_incompletas = completadas[(completadas["Porcentaje"] > 0) & (completadas["Porcentaje"] < 100)]
     completadas_total = pd.concat([completadas_100, completadas_incompletas])
     completadas_total_tareas = completadas_total["Tarea"].unique().tolist()
     
     # Gráfico de tareas completadas (100%)
-    resumen_tema_100 = completadas_100.groupby("Tema")["Tarea"].count()
-    total_por_tema = df_tareas.groupby("Tema")["Tarea"].count()
-    resumen_100 = pd.DataFrame({
-        "Completadas": resumen_tema_100,
-        "Total": total_por_tema
-    }).fillna(0).astype(int)
-    resumen_100["% completado"] = (resumen_100["Completadas"] / resumen_100["Total"] * 100).round(1)
-    
-    chart_data_100 = resumen_100.reset_index()
-    fig_100 = px.bar(
-        chart_data_100,
-        x="Tema",
-        y="% completado",
-        text=chart_data_100["% completado"].astype(str) + "%",
-        color_discrete_sequence=["#4C9A2A"],
-        hover_data={"Total": True, "% completado": True, "Completadas": True},
-        labels={"% completado": "% Completado"},
-        title="✅ Tareas completadas (100%) por tema"
-    )
-    fig_100.update_traces(textposition='outside')
-    fig_100.update_layout(yaxis_range=[0, 100])
-    st.plotly_chart(fig_100, use_container_width=True)
+    with tiempos.tramo("grafico"):
+        filtro_100 = ("rango_100", fecha_inicio, fecha_fin)
+        resumen_100 = _resumen_tema(version, filtro_100, completadas_100, df_tareas)
+        fig_100 = _figura_100(version, filtro_100, resumen_100)
+    with tiempos.tramo("plotly"):
+        st.plotly_chart(fig_100, use_container_width=True)
             
         # # Gráfico de tareas en proceso
         # if not completadas_incompletas.empty:
@@ -615,89 +735,112 @@ elif seccion == "Checklist de semanerx":
 
 
     
-    with st.expander("Ver registros detallados por aucane"):
-        aucane = st.selectbox("Selecciona una persona:", [""] + sorted(completadas["Usuario"].unique().tolist()))
-        if aucane:
-            registros_aucane = completadas[completadas["Usuario"] == aucane].sort_values("Fecha", ascending=False)
-            total_tareas = len(df_tareas)
-            completadas_aucane = len(registros_aucane)
-            porcentaje = round((completadas_aucane / total_tareas) * 100, 1) if total_tareas > 0 else 0
-            st.markdown(f"**{aucane} completó {completadas_aucane} de {total_tareas} tareas esta semana ({porcentaje}%)**")
-            if not registros_aucane.empty:
-                resumen_aucane = registros_aucane.groupby("Tema")["Tarea"].count()
-                resumen_aucane = resumen_aucane.reset_index().rename(columns={"Tarea": "Tareas completadas"})
-                st.dataframe(registros_aucane[["Fecha", "Tema", "Zona", "Tarea"]])
-                st.markdown("**Temas en los que más ha contribuido:**")
-                st.dataframe(resumen_aucane.sort_values("Tareas completadas", ascending=False))
-
-                fig_aucane = px.pie(
-                    resumen_aucane,
-                    names="Tema",
-                    values="Tareas completadas",
-                    title=f"Distribución de aportes de {aucane} por tema",
-                    color_discrete_sequence=["#4C9A2A"]
-                )
-                st.plotly_chart(fig_aucane, use_container_width=True, key=f"plot_{aucane}")
-            else:
-                st.info("Esta persona no ha completado tareas en el rango de fechas seleccionado.")
-            resumen_aucane = resumen_aucane.reset_index().rename(columns={"Tarea": "Tareas completadas"})
-            # st.dataframe(registros_aucane[["Fecha", "Tema", "Zona", "Tarea"]])
-            # st.markdown("**Temas en los que más ha contribuido:**")
-            # st.dataframe(resumen_aucane.sort_values("Tareas completadas", ascending=False))
-
-            # fig_aucane = px.pie(
-            #     resumen_aucane,
-            #     names="Tema",
-            #     values="Tareas completadas",
-            #     title=f"Distribución de aportes de {aucane} por tema",
-            #     color_discrete_sequence=["#4C9A2A"]
-            # )
-            # st.plotly_chart(fig_aucane, use_container_width=True)
-            # st.dataframe(completadas[["Fecha", "Usuario", "Tema", "Zona", "Tarea"]].sort_values("Fecha", ascending=False))
-
-            completadas = df_estado[df_estado["Semana"] == semana_actual]
-            resumen_tema = completadas.groupby("Tema")["Tarea"].count()
-            total_por_tema = df_tareas.groupby("Tema")["Tarea"].count()
-            resumen = pd.DataFrame({
-                "Completadas": resumen_tema,
-                "Total": total_por_tema
-            }).fillna(0).astype(int)
-            resumen["% completado"] = (resumen["Completadas"] / resumen["Total"] * 100).round(1)
-
-            st.dataframe(resumen)
-            st.caption("*Resumen de tareas completadas esta semana agrupadas por tema.*")
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+    @st.fragment
+    def _panel_aucane(fecha_inicio, fecha_fin):
+        df_tareas, particiones, version = _datos_checklist()
+        rango = ("rango", fecha_inicio, fecha_fin)
+        completadas = particiones.rango(fecha_inicio, fecha_fin)
+        ahora = datetime.datetime.now()
+        estado_semana = particiones.semana(ahora)
+
+        with st.expander("Ver registros detallados por aucane"):
+            aucane = st.selectbox("Selecciona una persona:", [""] + sorted(completadas["Usuario"].unique().tolist()))
+            if aucane:
+                registros_aucane, porcentaje, resumen_aucane = _reporte_aucane(version, rango, aucane, completadas, df_tareas)
+                st.markdown(f"**{aucane} completó {len(registros_aucane)} de {len(df_tareas)} tareas esta semana ({porcentaje}%)**")
+                if not registros_aucane.empty:
+                    st.dataframe(registros_aucane[["Fecha", "Tema", "Zona", "Tarea"]].reset_index(drop=True))
+                    st.markdown("**Temas en los que más ha contribuido:**")
+                    st.dataframe(resumen_aucane.sort_values("Tareas completadas", ascending=False))
+
+                    fig_aucane = _figura_aucane(version, rango, aucane, resumen_aucane)
+                    st.plotly_chart(fig_aucane, use_container_width=True, key=f"plot_{aucane}")
+                else:
+                    st.info("Esta persona no ha completado tareas en el rango de fechas seleccionado.")
+                # st.dataframe(registros_aucane[["Fecha", "Tema", "Zona", "Tarea"]])
+                # st.markdown("**Temas en los que más ha contribuido:**")
+                # st.dataframe(resumen_aucane.sort_values("Tareas completadas", ascending=False))
+
+                # fig_aucane = px.pie(
+                #     resumen_aucane,
+                #     names="Tema",
+                #     values="Tareas completadas",
+                #     title=f"Distribución de aportes de {aucane} por tema",
+                #     color_discrete_sequence=["#4C9A2A"]
+                # )
+                # st.plotly_chart(fig_aucane, use_container_width=True)
+                # st.dataframe(completadas[["Fecha", "Usuario", "Tema", "Zona", "Tarea"]].sort_values("Fecha", ascending=False))
+
+                resumen = _resumen_tema(version, ("semana", tareas.clave_semana(ahora)), estado_semana, df_tareas)
+
+                st.dataframe(resumen)
+                st.caption("*Resumen de tareas completadas esta semana agrupadas por tema.*")
+
+    with tiempos.tramo("aucane"):
+        _panel_aucane(fecha_inicio, fecha_fin)
+
+    @st.fragment
+    def _panel_tendencias():
+        df_tareas, particiones, version = _datos_checklist()
+        with st.expander("📈 Tendencias de las últimas semanas"):
+            t1, t2 = st.columns(2)
+            with t1:
+                n_semanas = st.slider("Semanas", min_value=4, max_value=52, value=12, step=4, key="tend_semanas")
+            with t2:
+                persona = st.selectbox("Persona", ["(Todas)"] + semaneros, key="tend_persona")
+            ahora = datetime.datetime.now()
+            semanas = tuple(tareas.semanas_entre(ahora - datetime.timedelta(weeks=n_semanas - 1), ahora))
+            usuario = None if persona == "(Todas)" else persona
+            por_semana, tasa = _tendencias(version, semanas, usuario, particiones, df_tareas)
+
+            titulo = f"Registros por semana de {persona}" if usuario else "Registros por semana (todas las personas)"
+            st.plotly_chart(
+                _figura_tendencia(version, (semanas, usuario), titulo, "Registros",
+                                  por_semana.rename(columns={"completa": "Completadas (100%)", "en_proceso": "En proceso"}),
+                                  ["#4C9A2A", "#FFA726"]),
+                width="stretch", key="plot_tendencia_aportes",
+            )
+            st.plotly_chart(
+                _figura_tendencia(version, (semanas, "temas"), "% de tareas completadas por tema", "% completado", tasa),
+                width="stretch", key="plot_tendencia_temas",
+            )
 
+    with tiempos.tramo("tendencias"):
+        _panel_tendencias()
+
+
+# Fin de la recarga: se guardan sus tiempos (si la medición está activa)
+tiempos.terminar()
+
+# Panel oculto de administración: se abre con ?admin=<clave> en la URL, donde la clave es la
+# variable de entorno AUCCA_ADMIN (sin ella no hay panel). Activar la medición afecta a
+# todas las sesiones del proceso, así que no puede quedar al alcance de cualquiera
+CLAVE_ADMIN = os.environ.get("AUCCA_ADMIN", "")
+if CLAVE_ADMIN and hmac.compare_digest(st.query_params.get("admin", "").encode(), CLAVE_ADMIN.encode()):
+    with st.expander("⏱️ Tiempos por etapa"):
+        st.checkbox("Medir tiempos", value=tiempos.ACTIVO, key="admin_medir",
+                    on_change=lambda: tiempos.activar(st.session_state["admin_medir"]))
+        ultimas = st.number_input("Últimas recargas", min_value=1, max_value=tiempos.MAX_RECARGAS, value=50)
+        filtro = st.selectbox("Sección", ["(Todas)", "portada"] + list(HOJAS_POR_SECCION), key="admin_seccion")
+        filas = tiempos.resumen(ultimas, None if filtro == "(Todas)" else filtro)
+        if filas:
+            st.dataframe(filas, width="stretch")
+            st.caption("Detalle de las últimas recargas (ms por tramo):")
+            st.dataframe([
+                dict({"sección": r["seccion"], "total": round(r["total"] * 1000, 1)},
+                     **{k: round(v * 1000, 1) for k, v in r["tramos"].items()})
+                for r in tiempos.ultimas_recargas(10)
+            ], width="stretch")
+        else:
+            st.info("Todavía no hay recargas medidas. Activa la medición y navega por la app.")
+        st.caption(f"Cada recarga medida se agrega a {tiempos.ARCHIVO} (JSON por línea).")
+    with st.expander("🗄️ Caché y descargas"):
+        import datos
+        st.caption("Caché de hojas compartida por todas las sesiones:")
+        st.json(datos.cache.estadisticas())
+        st.caption("Descargas por hoja y pedidos que esperaron una descarga ya en curso:")
+        st.json(datos.vuelos.estadisticas())
+        st.caption(f"Refresco en segundo plano: {datos.refrescador.refrescos} recargas, "
+                   f"{datos.refrescador.errores} errores.")
+        st.caption(f"Hojas vencidas que seguían iguales (no se descargaron): {datos.cambios['sin_cambios']}; "
+                   f"con cambios: {datos.cambios['con_cambios']}.")
@@ -0,0 +1,100 @@
+"""Almacén local (SQLite) con la última copia descargada de cada hoja."""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+
+class AlmacenSnapshots:
+    """Guarda en disco el DataFrame de cada hoja junto con la hora en que se descargó.
+
+    Sirve para que un arranque en frío muestre datos de inmediato (y para funcionar sin
+    conexión). Los valores se guardan como JSON para conservar los tipos de cada celda
+    tal como los entregó la planilla (números y textos mezclados en una misma columna).
+    Las filas que se agregan al final de una hoja ya guardada van aparte (``agregar``),
+    sin reescribir la copia completa; la próxima ``guardar`` de esa hoja las reemplaza.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._creada = False
+
+    def _conectar(self):
+        os.makedirs(os.path.dirname(self.ruta) or ".", exist_ok=True)
+        conexion = sqlite3.connect(self.ruta, timeout=10)
+        if not self._creada:
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                " hoja TEXT PRIMARY KEY, obtenido REAL NOT NULL, datos TEXT NOT NULL, meta TEXT)"
+            )
+            conexion.execute("CREATE TABLE IF NOT EXISTS agregadas (hoja TEXT NOT NULL, filas TEXT NOT NULL)")
+            self._creada = True
+        return conexion
+
+    def guardar(self, hoja, df, meta=None, obtenido=None):
+        datos = json.dumps(
+            {"columnas": [str(c) for c in df.columns], "filas": df.to_numpy(dtype=object).tolist()},
+            ensure_ascii=False, default=str,
+        )
+        with self._lock:
+            conexion = self._conectar()
+            try:
+                with conexion:
+                    conexion.execute(
+                        "INSERT OR REPLACE INTO snapshots (hoja, obtenido, datos, meta) VALUES (?, ?, ?, ?)",
+                        (hoja, obtenido or time.time(), datos, json.dumps(meta) if meta else None),
+                    )
+                    conexion.execute("DELETE FROM agregadas WHERE hoja = ?", (hoja,))
+            finally:
+                conexion.close()
+
+    def agregar(self, hoja, df, meta, previas, obtenido=None):
+        """Agrega las filas de ``df`` al final de la copia de ``hoja`` y reemplaza su ``meta``.
+
+        Solo si la copia guardada tiene ``previas`` filas (según su meta); si no (no hay
+        copia, o quedó atrasada) no hace nada y devuelve False, para guardarla completa.
+        """
+        filas = json.dumps(df.to_numpy(dtype=object).tolist(), ensure_ascii=False, default=str)
+        with self._lock:
+            conexion = self._conectar()
+            try:
+                with conexion:
+                    fila = conexion.execute("SELECT meta FROM snapshots WHERE hoja = ?", (hoja,)).fetchone()
+                    if fila is None or not fila[0] or json.loads(fila[0]).get("filas") != previas:
+                        return False
+                    conexion.execute(
+                        "UPDATE snapshots SET obtenido = ?, meta = ? WHERE hoja = ?",
+                        (obtenido or time.time(), json.dumps(meta), hoja),
+                    )
+                    if len(df):
+                        conexion.execute("INSERT INTO agregadas (hoja, filas) VALUES (?, ?)", (hoja, filas))
+                return True
+            finally:
+                conexion.close()
+
+    def leer(self, hoja):
+        """Devuelve ``(df, meta, obtenido)`` o None si no hay copia de esa hoja."""
+        if not os.path.exists(self.ruta):
+            return None
+        with self._lock:
+            conexion = self._conectar()
+            try:
+                fila = conexion.execute(
+                    "SELECT datos, meta, obtenido FROM snapshots WHERE hoja = ?", (hoja,)
+                ).fetchone()
+                agregadas = conexion.execute(
+                    "SELECT filas FROM agregadas WHERE hoja = ? ORDER BY rowid", (hoja,)
+                ).fetchall() if fila is not None else []
+            finally:
+                conexion.close()
+        if fila is None:
+            return None
+        datos = json.loads(fila[0])
+        for (filas,) in agregadas:
+            datos["filas"].extend(json.loads(filas))
+        df = pd.DataFrame(datos["filas"], columns=datos["columnas"])
+        return df, (json.loads(fila[1]) if fila[1] else None), fila[2]
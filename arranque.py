@@ -0,0 +1,88 @@
+"""Costo de arranque de la app: cuánto tarda cada import pesado y la portada.
+
+Uso::
+
+    python arranque.py              # tabla con el costo de cada import y de la portada
+    python arranque.py --limite 2   # falla (código 1) si la portada tarda más de 2 s
+
+La portada (``seccion == ""``) no debe importar ninguno de los módulos de ``PESADOS``;
+si alguno aparece, también se considera una regresión.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+RUTA_APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "acuerdos.py")
+
+PESADOS = ["pandas", "gspread", "google.oauth2.service_account", "plotly.express"]
+
+# Segundos que puede tardar la primera ejecución de la portada
+LIMITE_PORTADA = float(os.environ.get("AUCCA_LIMITE_PORTADA", "1.5"))
+
+_SCRIPT_PORTADA = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+inicio = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=60)
+at.run()
+print(json.dumps({
+    "segundos": time.perf_counter() - inicio,
+    "modulos": [m for m in json.loads(sys.argv[2]) if m in sys.modules],
+    "errores": [e.message for e in at.exception],
+}))
+"""
+
+
+def costo_import(modulo):
+    """Segundos que tarda ``import modulo`` en un intérprete nuevo (según ``-X importtime``)."""
+    salida = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        capture_output=True, text=True,
+    )
+    if salida.returncode != 0:
+        return None
+    for linea in reversed(salida.stderr.splitlines()):
+        partes = [p.strip() for p in linea.split("|")]
+        if len(partes) == 3 and partes[2] == modulo:
+            return int(partes[1]) / 1e6
+    return None
+
+
+def medir_portada(ruta=RUTA_APP):
+    """Ejecuta la portada en un proceso aparte y devuelve tiempo, módulos pesados y errores."""
+    salida = subprocess.run(
+        [sys.executable, "-c", _SCRIPT_PORTADA, ruta, json.dumps(PESADOS)],
+        capture_output=True, text=True, cwd=os.path.dirname(ruta),
+    )
+    if salida.returncode != 0:
+        raise RuntimeError(salida.stderr.strip().splitlines()[-1] if salida.stderr else "falló la portada")
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--limite", type=float, default=LIMITE_PORTADA,
+                        help="segundos máximos para la portada (por defecto %(default)s)")
+    args = parser.parse_args(argv)
+
+    print(f"{'import':<32}{'segundos':>10}")
+    for modulo in PESADOS:
+        costo = costo_import(modulo)
+        print(f"{modulo:<32}{'no instalado' if costo is None else f'{costo:.3f}':>10}")
+
+    portada = medir_portada()
+    print(f"\nportada: {portada['segundos']:.3f} s (límite {args.limite:.3f} s)")
+
+    problemas = [f"la portada importa {m}" for m in portada["modulos"]]
+    problemas += [f"error en la portada: {e}" for e in portada["errores"]]
+    if portada["segundos"] > args.limite:
+        problemas.append(f"la portada tardó {portada['segundos']:.3f} s")
+    for problema in problemas:
+        print(f"REGRESIÓN: {problema}")
+    return 1 if problemas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""Benchmarks de la app con una planilla falsa en memoria.
+
+Reemplaza el backend de Google Sheets por ``datos.BackendLocal`` con datos de
+``sinteticos.py`` y mide las partes que dependen del tamaño de las hojas. Cada corrida
+se agrega a ``resultados.jsonl`` con el commit, para comparar antes y después de un cambio.
+
+Uso::
+
+    python benchmarks/bench.py                          # 100, 1.000 y 10.000 filas
+    python benchmarks/bench.py --filas 1000000 --casos busqueda,semana
+    python benchmarks/bench.py --comparar <commit>      # contra la última corrida de ese commit
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Caché local y cola de escritura en un directorio temporal, nunca en el del proyecto
+os.environ.setdefault("AUCCA_DIR_LOCAL", tempfile.mkdtemp(prefix="aucca_bench_"))
+# Sin snapshots: al cambiar de tamaño la primera carga serviría la copia del tamaño anterior
+os.environ.setdefault("AUCCA_SNAPSHOTS", "0")
+# Sin refresco en segundo plano: sus descargas se mezclarían con las mediciones
+os.environ.setdefault("AUCCA_REFRESCO", "0")
+
+import pandas as pd  # noqa: E402
+
+import busqueda  # noqa: E402
+import datos  # noqa: E402
+import documentos  # noqa: E402
+import esquemas  # noqa: E402
+import sinteticos  # noqa: E402
+import tareas  # noqa: E402
+
+RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados.jsonl")
+HOJAS = ["links", "tareas_semaneros", "estado_tareas"]
+CONSULTAS = ["compost", "semilas comunitaria", "bokasi", "ejemplo7.cl"]
+REGISTROS = 100
+MAX_RESULTADOS = 120
+
+
+class Contexto:
+    """Datos de una prueba de tamaño ``filas``: hojas tipadas, estado_tareas por semana
+    (como lo usa el checklist) y los textos de búsqueda de los links."""
+
+    def __init__(self, filas):
+        self.filas = filas
+        self.hoy = datetime.datetime.now()
+        datos.usar_backend(datos.BackendLocal(sinteticos.hojas(filas)))
+        self.tipadas = cargar_tipadas()
+        self.particiones = tareas.ParticionesEstado().actualizar(datos.cargar_hoja("estado_tareas", copiar=False))
+        self.textos = None
+
+    @property
+    def links(self):
+        return self.tipadas["links"]
+
+    @property
+    def df_tareas(self):
+        return self.tipadas["tareas_semaneros"]
+
+    @property
+    def df_estado(self):
+        return self.tipadas["estado_tareas"]
+
+
+def cargar_tipadas():
+    # Descarga (backend en memoria), armado del DataFrame y tipado según esquemas.py
+    datos.invalidar()
+    hojas = datos.cargar_hojas(HOJAS, copiar=False)
+    return {h: esquemas.normalizar(h, df) for h, df in hojas.items()}
+
+
+def caso_carga(ctx):
+    cargar_tipadas()
+
+
+def caso_textos(ctx):
+    # Mismas columnas que la sección de links
+    columnas = esquemas.ESQUEMAS["links"].texto
+    ctx.textos = busqueda.TextosBusqueda(ctx.links[columnas].itertuples(index=False, name=None))
+
+
+def caso_busqueda(ctx):
+    if ctx.textos is None:
+        caso_textos(ctx)
+    for consulta in CONSULTAS:
+        ctx.links.iloc[ctx.textos.buscar(consulta)]
+
+
+def caso_ranking(ctx):
+    # Las más relevantes de cada consulta, como la sección de links
+    if ctx.textos is None:
+        caso_textos(ctx)
+    for consulta in CONSULTAS:
+        ranking = ctx.textos.mejores(consulta, MAX_RESULTADOS)
+        ctx.links.iloc[[i for i, _ in ranking]]
+
+
+def caso_documentos(ctx):
+    # Almacén de todas las secciones (aquí solo links y tareas) y la búsqueda de la portada
+    almacen = documentos.AlmacenDocumentos(ctx.tipadas)
+    for consulta in CONSULTAS:
+        almacen.buscar(consulta)
+
+
+def caso_semana(ctx):
+    # Lo que hace el checklist al elegir un nombre
+    estado_semana = ctx.particiones.semana(ctx.hoy)
+    completadas_100 = estado_semana.loc[estado_semana["Porcentaje"] == 100, "ID_tarea"].unique()
+    pendientes = ctx.df_tareas[~ctx.df_tareas["ID_tarea"].isin(completadas_100)]
+    avance = tareas.avance_maximo(estado_semana)
+    tareas.preparar_checklist(pendientes, avance, sinteticos.USUARIOS[0], tareas.clave_semana(ctx.hoy))
+
+
+def caso_aucane(ctx):
+    inicio, fin = tareas.limites_semana(ctx.hoy)
+    completadas = ctx.particiones.rango(inicio, fin)
+    for aucane in sinteticos.USUARIOS:
+        tareas.reporte_aucane(completadas, ctx.df_tareas, aucane)
+    tareas.resumen_por_tema(ctx.particiones.semana(ctx.hoy), ctx.df_tareas)
+
+
+def caso_grafico(ctx):
+    # Tabla del resumen por tema y datos del gráfico de barras (sin dibujarlo)
+    inicio, fin = tareas.limites_semana(ctx.hoy)
+    completadas = ctx.particiones.rango(inicio, fin)
+    tareas.resumen_por_tema(completadas, ctx.df_tareas)
+    completadas_100 = completadas[completadas["Porcentaje"] == 100]
+    tareas.resumen_por_tema(completadas_100, ctx.df_tareas).reset_index()
+
+
+def caso_tendencias(ctx):
+    # 52 semanas de aportes por persona y de % completado por tema, desde el cubo
+    semanas = tareas.semanas_entre(ctx.hoy - datetime.timedelta(weeks=51), ctx.hoy)
+    aportes = ctx.particiones.aportes(tareas.lunes_semana(semanas[0]), ctx.hoy)
+    for usuario in sinteticos.USUARIOS:
+        tareas.aportes_por_semana(aportes, semanas, usuario)
+    tareas.tasa_por_tema(aportes, ctx.df_tareas, semanas)
+
+
+def caso_particiones(ctx):
+    # Una fila nueva al final de estado_tareas: solo se tipa esa fila y su semana
+    crudo = datos.cargar_hoja("estado_tareas", copiar=False)
+    ctx.particiones.actualizar(crudo, version=("bench", len(crudo)))
+    crecido = pd.concat([crudo, crudo.tail(1)], ignore_index=True)
+    inicio = time.perf_counter()
+    ctx.particiones.actualizar(crecido, version=("bench", len(crecido)), completa=False)
+    return time.perf_counter() - inicio
+
+
+def caso_registro(ctx):
+    # REGISTROS filas encoladas hasta que el backend falso las confirma
+    cola = datos.ColaEscritura(
+        "estado_tareas", os.path.join(datos.DIR_LOCAL, f"bench_{time.monotonic_ns()}.jsonl"), espera_lote=0,
+    )
+    fila = ctx.df_estado.iloc[0][tareas.COLUMNAS_ESTADO].tolist()
+    ids = [cola.encolar(fila) for _ in range(REGISTROS)]
+    while any(cola.estado(i) == cola.PENDIENTE for i in ids):
+        time.sleep(0.001)
+
+
+CASOS = {
+    "carga": caso_carga,
+    "textos": caso_textos,
+    "busqueda": caso_busqueda,
+    "ranking": caso_ranking,
+    "documentos": caso_documentos,
+    "semana": caso_semana,
+    "aucane": caso_aucane,
+    "grafico": caso_grafico,
+    "tendencias": caso_tendencias,
+    "particiones": caso_particiones,
+    "registro": caso_registro,
+}
+
+
+def medir(funcion, ctx, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        # Un caso puede devolver su propio tiempo si tiene que preparar algo antes de medir
+        propio = funcion(ctx)
+        tiempos.append(propio if propio is not None else time.perf_counter() - inicio)
+    return min(tiempos), statistics.median(tiempos)
+
+
+def commit_actual():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        sucio = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=RAIZ,
+                               capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocido"
+    return commit + ("+cambios" if sucio else "")
+
+
+def leer_resultados(ruta=RESULTADOS):
+    if not os.path.exists(ruta):
+        return []
+    with open(ruta, encoding="utf-8") as f:
+        return [json.loads(linea) for linea in f if linea.strip()]
+
+
+def comparar(actuales, referencia, ruta=RESULTADOS):
+    """Imprime la razón entre ``actuales`` y la última medición de cada caso en ``referencia``."""
+    previos = {}
+    for r in leer_resultados(ruta):
+        if r["commit"].startswith(referencia):
+            previos[(r["caso"], r["filas"])] = r
+    if not previos:
+        print(f"No hay resultados guardados para {referencia}")
+        return
+    print(f"\n{'caso':<12}{'filas':>10}{referencia[:12]:>14}{'actual':>12}{'razón':>9}")
+    for r in actuales:
+        previo = previos.get((r["caso"], r["filas"]))
+        if previo is None:
+            continue
+        razon = r["minimo"] / previo["minimo"] if previo["minimo"] else float("inf")
+        print(f"{r['caso']:<12}{r['filas']:>10}{previo['minimo']:>14.4f}{r['minimo']:>12.4f}{razon:>8.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", default="100,1000,10000",
+                        help="tamaños a probar, separados por coma (hasta 1000000)")
+    parser.add_argument("--casos", default=",".join(CASOS), help="casos a medir, separados por coma")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--comparar", metavar="COMMIT", help="comparar contra la última corrida de ese commit")
+    parser.add_argument("--no-guardar", action="store_true", help="no agregar la corrida a resultados.jsonl")
+    args = parser.parse_args(argv)
+
+    casos = [c.strip() for c in args.casos.split(",") if c.strip()]
+    desconocidos = [c for c in casos if c not in CASOS]
+    if desconocidos:
+        parser.error(f"casos desconocidos: {', '.join(desconocidos)}")
+
+    base = {
+        "commit": commit_actual(),
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+    }
+    resultados = []
+    print(f"{'caso':<12}{'filas':>10}{'mínimo':>12}{'mediana':>12}")
+    for filas in (int(n) for n in args.filas.split(",")):
+        ctx = Contexto(filas)
+        for caso in casos:
+            minimo, mediana = medir(CASOS[caso], ctx, args.repeticiones)
+            resultados.append(dict(base, caso=caso, filas=filas, minimo=minimo, mediana=mediana,
+                                   repeticiones=args.repeticiones))
+            print(f"{caso:<12}{filas:>10}{minimo:>12.4f}{mediana:>12.4f}")
+
+    if args.comparar:
+        comparar(resultados, args.comparar)
+    if not args.no_guardar:
+        with open(RESULTADOS, "a", encoding="utf-8") as f:
+            for r in resultados:
+                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Datos sintéticos con la forma de las hojas reales (listas de filas, encabezado primero).
+
+Las filas vienen como texto, igual que las entrega la API de Sheets, así que se pueden
+pasar directo a ``datos.BackendLocal``. Con la misma semilla se obtienen los mismos datos.
+"""
+import datetime
+import random
+
+PETALOS = ["tierra", "agua", "fuego", "aire", "semilla"]
+TEMAS = ["Huerta", "Cocina", "Baños", "Compost", "Bioconstrucción", "Vivero", "Taller", "Riego"]
+TIPOS = ["Doc", "Planilla", "Carpeta", "Video", "Formulario"]
+PALABRAS = [
+    "compost", "semillas", "huerta", "comunitaria", "riego", "goteo", "vivero", "bokashi",
+    "lombricultura", "minga", "acta", "reunión", "presupuesto", "turnos", "visitas", "taller",
+]
+USUARIOS = ["Chalo", "Camilú", "Niko", "Diego", "Francis", "Tais", "Cala"]
+MESES = ["enero", "febrero", "marzo", "abril", "mayo", "junio", "julio", "agosto",
+         "septiembre", "octubre", "noviembre", "diciembre"]
+
+
+def _frase(rnd, n):
+    return " ".join(rnd.choice(PALABRAS) for _ in range(n))
+
+
+def links(n, semilla=0):
+    """``n`` enlaces; algunos sin fecha (solo año) o sin año, como en la planilla."""
+    rnd = random.Random(semilla)
+    filas = [["Pétalo", "Tema", "Detalle", "Tipo", "Fecha creación", "Año", "Nombre", "Descripción", "URL"]]
+    for i in range(n):
+        anio = rnd.randint(2018, 2025)
+        fecha = f"{rnd.randint(1, 28)} {rnd.choice(MESES)} {anio}" if rnd.random() < 0.7 else ""
+        filas.append([
+            rnd.choice(PETALOS),
+            rnd.choice(TEMAS),
+            _frase(rnd, 2),
+            rnd.choice(TIPOS),
+            fecha,
+            str(anio) if rnd.random() < 0.9 else "",
+            f"{_frase(rnd, 3).capitalize()} {i}",
+            _frase(rnd, 8),
+            f"https://www.ejemplo{i % 50}.cl/{i}",
+        ])
+    return filas
+
+
+def tareas_semaneros(n, semilla=0):
+    """``n`` tareas repartidas entre los temas, con nombres únicos."""
+    rnd = random.Random(semilla)
+    filas = [["Tema", "Zona", "Tarea"]]
+    for i in range(n):
+        tema = TEMAS[i % len(TEMAS)]
+        filas.append([tema, f"Zona {rnd.randint(1, 12)}", f"{_frase(rnd, 2).capitalize()} {tema} {i}"])
+    return filas
+
+
+def estado_tareas(n, tareas, semanas=12, hasta=None, semilla=0):
+    """``n`` registros de avance sobre ``tareas`` (salida de ``tareas_semaneros``), con
+    fechas repartidas en las ``semanas`` anteriores a ``hasta`` y ordenadas como se agregan."""
+    rnd = random.Random(semilla)
+    hasta = hasta or datetime.datetime.now()
+    desde = hasta - datetime.timedelta(weeks=semanas)
+    minutos = int((hasta - desde).total_seconds() // 60)
+    fechas = sorted(desde + datetime.timedelta(minutes=rnd.randrange(minutos)) for _ in range(n))
+    filas = [["Fecha", "Usuario", "Tema", "Zona", "Tarea", "Completada", "Porcentaje", "Observaciones"]]
+    for fecha in fechas:
+        tema, zona, tarea = rnd.choice(tareas[1:])
+        porcentaje = rnd.choice([100, 100, 100, 80, 50, 30, 10])
+        filas.append([
+            fecha.strftime("%Y-%m-%d %H:%M"),
+            rnd.choice(USUARIOS),
+            tema,
+            zona,
+            tarea,
+            "Sí" if porcentaje == 100 else "En proceso",
+            str(porcentaje),
+            _frase(rnd, 4) if rnd.random() < 0.3 else "",
+        ])
+    return filas
+
+
+def hojas(n, semilla=0):
+    """Las tres hojas para una prueba de tamaño ``n``.
+
+    ``links`` y ``estado_tareas`` tienen ``n`` filas; las tareas son ``n // 20`` (entre
+    10 y 5000), que es la proporción aproximada entre catálogo y registros de la planilla.
+    """
+    tareas = tareas_semaneros(min(max(n // 20, 10), 5000), semilla)
+    return {
+        "links": links(n, semilla),
+        "tareas_semaneros": tareas,
+        "estado_tareas": estado_tareas(n, tareas, semilla=semilla),
+    }
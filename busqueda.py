@@ -0,0 +1,148 @@
+"""Búsqueda aproximada (tolerante a errores de tipeo) para las secciones de la app."""
+import heapq
+import re
+from difflib import SequenceMatcher
+
+import numpy as np
+
+
+def _approx_contains_text(value, ql: str, thr: float = 0.8) -> bool:
+    """Búsqueda aproximada tolerante a errores de tipeo."""
+    s = "" if value is None else str(value)
+    s = s.lower()
+
+    # 1) Substring directo
+    if ql in s:
+        return True
+
+    # quick_ratio() y real_quick_ratio() son cotas superiores de ratio(): si no
+    # alcanzan el umbral, nos ahorramos el cálculo caro
+    sm = SequenceMatcher(None, ql, "")
+
+    def _parecido(frag):
+        sm.set_seq2(frag)
+        return sm.real_quick_ratio() >= thr and sm.quick_ratio() >= thr and sm.ratio() >= thr
+
+    # 2) Aproximación por tokens (palabras)
+    tokens = re.findall(r"\w+", s)
+    for t in tokens:
+        if _parecido(t):
+            return True
+
+    # 3) Aproximación por ventana deslizante (frases)
+    L = len(ql)
+    if L >= 4 and len(s) >= L:
+        for i in range(len(s) - L + 1):
+            if _parecido(s[i:i+L]):
+                return True
+
+    return False
+
+
+def _puntaje_texto(value, ql: str, thr: float = 0.8, piso: float = 0.0) -> float:
+    """Parecido entre ``ql`` y la celda: 1.0 si la contiene tal cual; si no, el mejor
+    ``ratio()`` entre sus palabras y ventanas (0.0 si ninguno alcanza ``thr``).
+
+    Coincide con ``_approx_contains_text``: una celda tiene puntaje > 0 si y solo si
+    esa función devuelve True. Con ``piso`` devuelve 0.0 también si no llega a ese valor.
+    """
+    s = "" if value is None else str(value)
+    s = s.lower()
+    if ql in s:
+        return 1.0
+
+    mejor = 0.0
+    piso = max(thr, piso)
+    sm = SequenceMatcher(None, ql, "")
+
+    def _parecido(frag):
+        # Las cotas rápidas también descartan lo que no supera al mejor hasta ahora
+        nonlocal mejor
+        minimo = max(piso, mejor)
+        sm.set_seq2(frag)
+        if sm.real_quick_ratio() >= minimo and sm.quick_ratio() >= minimo:
+            r = sm.ratio()
+            if r >= minimo:
+                mejor = r
+
+    for t in re.findall(r"\w+", s):
+        _parecido(t)
+
+    L = len(ql)
+    if L >= 4 and len(s) >= L:
+        for i in range(len(s) - L + 1):
+            _parecido(s[i:i+L])
+
+    return mejor
+
+
+class TextosBusqueda:
+    """Celdas de un DataFrame ya pasadas a texto en minúsculas, para buscar en ellas.
+
+    Se arma una vez por versión de los datos. ``buscar`` revisa todas las filas con
+    ``_approx_contains_text`` (sus cotas rápidas descartan casi todo sin calcular
+    ``ratio()``); conviene pasar solo las columnas de texto en las que se busca.
+    """
+
+    def __init__(self, filas):
+        self.textos = [tuple(("" if v is None else str(v)).lower() for v in fila) for fila in filas]
+
+    def __len__(self):
+        return len(self.textos)
+
+    def buscar(self, ql, thr=0.8, permitidas=None):
+        """Posiciones (en orden) de las filas con alguna celda que coincide con ``ql``.
+
+        Con ``permitidas`` (máscara booleana por fila) solo se revisan esas filas.
+        """
+        filas = range(len(self.textos)) if permitidas is None else np.flatnonzero(permitidas).tolist()
+        return [i for i in filas if any(_approx_contains_text(t, ql, thr) for t in self.textos[i])]
+
+    def mejores(self, ql, k, thr=0.8, desempate=None, permitidas=None):
+        """Las ``k`` filas más parecidas a ``ql`` como ``[(posición, puntaje), ...]``, la mejor primero.
+
+        El puntaje de una fila es el de su mejor celda (ver ``_puntaje_texto``); a igual
+        puntaje gana el menor valor de ``desempate`` (por defecto, la posición). Con
+        ``permitidas`` (máscara booleana por fila) solo se consideran esas filas.
+
+        Primero se buscan las filas que contienen la consulta tal cual (puntaje 1.0, y
+        ``in`` es barato): si ya son ``k``, no se calcula ningún otro puntaje. Si no, el
+        resto se puntúa guardando solo las ``k`` mejores en un heap, y las celdas que no
+        alcanzan a la peor guardada se descartan con las cotas rápidas.
+        """
+        if k <= 0:
+            return []
+        filas = np.arange(len(self.textos)) if permitidas is None else np.flatnonzero(permitidas)
+        if desempate is None:
+            desempate = np.arange(len(self.textos))
+        desempate = np.asarray(desempate)
+        filas = filas[np.argsort(desempate[filas], kind="stable")].tolist()
+
+        exactas = [i for i in filas if any(ql in t for t in self.textos[i])]
+        if len(exactas) >= k:
+            return [(i, 1.0) for i in exactas[:k]]
+
+        # Heap de mínimos con las k mejores: en la raíz queda la peor (menor puntaje,
+        # mayor desempate), que es la que sale si llega una mejor
+        heap = [(1.0, -desempate[i].item(), -i) for i in exactas]
+        heapq.heapify(heap)
+        vistas = set(exactas)
+        for i in filas:
+            if i in vistas:
+                continue
+            # Con el heap lleno, las celdas que no alcanzan a la peor guardada no sirven
+            lleno = len(heap) == k
+            piso = heap[0][0] if lleno else 0.0
+            puntaje = 0.0
+            for t in self.textos[i]:
+                p = _puntaje_texto(t, ql, thr, max(piso, puntaje))
+                if p > puntaje:
+                    puntaje = p
+            if not puntaje:
+                continue
+            clave = (puntaje, -desempate[i].item(), -i)
+            if not lleno:
+                heapq.heappush(heap, clave)
+            elif clave > heap[0]:
+                heapq.heapreplace(heap, clave)
+        return [(-i, puntaje) for puntaje, _, i in sorted(heap, reverse=True)]
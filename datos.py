@@ -0,0 +1,1188 @@
+"""Capa de datos de la app: lectura de Google Sheets con caché compartida."""
+import csv
+import itertools
+import json
+import logging
+import math
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import pandas as pd
+
+import tiempos
+from almacen import AlmacenSnapshots
+
+SPREADSHEET_KEY = "1C8njkp0RQMdXnxuJvPvfK_pNZHQSi7q7dUPeUg-2624"
+SCOPES = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/drive"
+]
+
+# Configuración de la caché (se puede ajustar con variables de entorno)
+CACHE_TTL = float(os.environ.get("AUCCA_CACHE_TTL", 600))           # segundos
+CACHE_MAX_MB = float(os.environ.get("AUCCA_CACHE_MAX_MB", 256))      # memoria total
+CACHE_MAX_ENTRADAS = int(os.environ.get("AUCCA_CACHE_MAX_ENTRADAS", 64))
+
+# Hojas a las que la app solo agrega filas: al vencer se traen únicamente las filas nuevas.
+# Cada tantas lecturas incrementales se hace igual una recarga completa, por si alguien
+# editó a mano una fila intermedia (eso no se detecta de forma barata).
+HOJAS_INCREMENTALES = {"estado_tareas"}
+REFRESCO_COMPLETO_CADA = int(os.environ.get("AUCCA_REFRESCO_COMPLETO_CADA", 20))
+
+# Refresco en segundo plano: estas hojas se vuelven a descargar antes de vencer, para que
+# ninguna recarga de la app espere a Google Sheets. Intervalos en segundos por hoja; se
+# pueden cambiar con AUCCA_REFRESCO_HOJAS="estado_tareas=30,links=300" (0 no la refresca).
+REFRESCO_ACTIVO = os.environ.get("AUCCA_REFRESCO", "1") != "0"
+REFRESCO_HOJAS = {"estado_tareas": 60, "tareas_semaneros": 0.8 * CACHE_TTL, "links": 0.8 * CACHE_TTL}
+REFRESCO_HOJAS.update(
+    (hoja.strip(), float(segundos))
+    for hoja, segundos in (par.split("=") for par in os.environ.get("AUCCA_REFRESCO_HOJAS", "").split(",") if par.strip())
+)
+# Una hoja que nadie lee hace tanto tiempo deja de refrescarse (hasta que se vuelva a leer)
+REFRESCO_INACTIVIDAD = float(os.environ.get("AUCCA_REFRESCO_INACTIVIDAD", 1800))
+
+# Carpeta para archivos locales de la app (cola de escrituras pendientes, copias de las hojas)
+DIR_LOCAL = os.environ.get("AUCCA_DIR_LOCAL", ".aucca_local")
+
+# Copias locales de cada hoja para arrancar rápido (se revalidan en segundo plano)
+USAR_SNAPSHOTS = os.environ.get("AUCCA_SNAPSHOTS", "1") != "0"
+
+# Modo sin conexión: en vez de Google Sheets se usan archivos CSV (una hoja por archivo)
+OFFLINE = os.environ.get("AUCCA_OFFLINE", "0") not in ("", "0")
+DIR_OFFLINE = os.environ.get("AUCCA_DIR_OFFLINE", "datos_locales")
+
+_log = logging.getLogger(__name__)
+
+
+def _bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class _Entrada:
+    __slots__ = ("df", "obtenido", "bytes", "generacion", "meta", "firma")
+
+    def __init__(self, df, generacion, meta=None, obtenido=None, bytes=None):
+        self.df = df
+        self.obtenido = time.monotonic() if obtenido is None else obtenido
+        self.bytes = _bytes(df) if bytes is None else bytes
+        self.generacion = generacion
+        self.meta = meta
+        # Señal de cambios de la hoja cuando se descargó (ver _renovar_sin_cambios)
+        self.firma = None
+
+
+class CacheHojas:
+    """Caché LRU con TTL para hojas ya descargadas.
+
+    Vive a nivel de proceso, así que todas las sesiones de Streamlit la comparten.
+    Las claves son ``(hoja, version)``: al invalidar una hoja sube su versión y las
+    entradas anteriores dejan de usarse.
+    """
+
+    def __init__(self, ttl=CACHE_TTL, max_bytes=int(CACHE_MAX_MB * 1024 * 1024),
+                 max_entradas=CACHE_MAX_ENTRADAS):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()
+        self._versiones = {}
+        self._generaciones = itertools.count(1)
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+
+    def version(self, hoja):
+        with self._lock:
+            return self._versiones.get(hoja, 0)
+
+    def clave(self, hoja):
+        return (hoja, self.version(hoja))
+
+    def obtener(self, clave, contar=True):
+        """Devuelve la entrada vigente o None (y cuenta el acierto/fallo si ``contar``)."""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and time.monotonic() - entrada.obtenido > self.ttl:
+                # Vencida: se deja en su lugar por si sirve para una lectura incremental
+                entrada = None
+            if entrada is None:
+                self.fallos += contar
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += contar
+            return entrada
+
+    def anterior(self, clave):
+        """Devuelve la entrada aunque esté vencida (sin contar acierto ni fallo)."""
+        with self._lock:
+            return self._entradas.get(clave)
+
+    def vencida(self, clave):
+        """Entrada vencida por tiempo que puede servirse mientras se revalida, o None.
+
+        Las marcadas con ``vencer`` no cuentan: ahí la app sabe que la hoja cambió.
+        """
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None or not math.isfinite(entrada.obtenido):
+                return None
+            return entrada
+
+    def renovar(self, clave, meta=None):
+        """Marca como recién obtenida una entrada cuyos datos no cambiaron."""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                entrada.obtenido = time.monotonic()
+                if meta is not None:
+                    entrada.meta = meta
+                self._entradas.move_to_end(clave)
+            return entrada
+
+    def guardar(self, clave, df, meta=None, obtenido=None, bytes=None):
+        """Guarda (o reemplaza) la entrada; ``obtenido`` conserva la edad de una anterior.
+
+        ``bytes`` evita medir de nuevo un DataFrame grande que solo creció unas filas.
+        """
+        with self._lock:
+            if clave in self._entradas:
+                self._quitar(clave)
+            entrada = _Entrada(df, next(self._generaciones), meta, obtenido, bytes)
+            self._entradas[clave] = entrada
+            self._bytes += entrada.bytes
+            # Expulsar las menos usadas hasta respetar los límites (siempre queda la nueva)
+            while len(self._entradas) > 1 and (
+                len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes
+            ):
+                self._quitar(next(iter(self._entradas)))
+                self.expulsiones += 1
+            return entrada
+
+    def invalidar(self, hoja=None):
+        """Sube la versión de una hoja (o de todas) y descarta sus entradas."""
+        with self._lock:
+            hojas = [hoja] if hoja is not None else {h for h, _ in self._entradas} | set(self._versiones)
+            for h in hojas:
+                self._versiones[h] = self._versiones.get(h, 0) + 1
+            for clave in [c for c in self._entradas if c[0] in hojas]:
+                self._quitar(clave)
+
+    def vencer(self, hoja):
+        """Da por vencida la entrada actual de una hoja (se revalida en la próxima lectura)."""
+        with self._lock:
+            entrada = self._entradas.get(self.clave(hoja))
+            if entrada is not None:
+                entrada.obtenido = float("-inf")
+
+    def version_datos(self, hoja):
+        """Identificador de los datos en caché de una hoja; cambia con cada recarga."""
+        with self._lock:
+            clave = self.clave(hoja)
+            entrada = self._entradas.get(clave)
+            return None if entrada is None else (clave[1], entrada.generacion)
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / total, 3) if total else 0.0,
+                "expulsiones": self.expulsiones,
+                "entradas": len(self._entradas),
+                "mb": round(self._bytes / (1024 * 1024), 2),
+            }
+
+    def _quitar(self, clave):
+        entrada = self._entradas.pop(clave)
+        self._bytes -= entrada.bytes
+
+
+cache = CacheHojas()
+
+
+class _Vuelo:
+    __slots__ = ("listo", "resultado", "error")
+
+    def __init__(self):
+        self.listo = threading.Event()
+        self.resultado = None
+        self.error = None
+
+    def esperar(self):
+        self.listo.wait()
+        if self.error is not None:
+            raise self.error
+        return self.resultado
+
+
+class VuelosEnCurso:
+    """Una sola descarga a la vez por clave ``(hoja, version)`` en todo el proceso.
+
+    El primero que pide una clave la descarga; los que llegan mientras tanto esperan ese
+    mismo resultado (o su error) en vez de repetir la llamada a la API. Así, al vencer
+    la caché o tras "Actualizar Base de datos", N sesiones hacen una sola descarga.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._vuelos = {}
+        self.descargas = 0
+        self.coalescidas = 0
+
+    def tomar(self, clave):
+        """Devuelve ``(vuelo, lider)``: si ``lider`` es True, le toca hacer la descarga y
+        cerrarla con ``terminar``; si no, basta con ``vuelo.esperar()``."""
+        with self._lock:
+            vuelo = self._vuelos.get(clave)
+            if vuelo is not None:
+                self.coalescidas += 1
+                return vuelo, False
+            vuelo = self._vuelos[clave] = _Vuelo()
+            return vuelo, True
+
+    def terminar(self, clave, vuelo, resultado=None, error=None, descargo=True):
+        with self._lock:
+            if self._vuelos.get(clave) is vuelo:
+                del self._vuelos[clave]
+            self.descargas += descargo
+        vuelo.resultado, vuelo.error = resultado, error
+        vuelo.listo.set()
+
+    def hacer(self, clave, funcion):
+        """``funcion()`` si nadie más la está haciendo para ``clave``; si no, su resultado."""
+        vuelo, lider = self.tomar(clave)
+        if not lider:
+            return vuelo.esperar()
+        try:
+            resultado = funcion()
+        except BaseException as e:
+            self.terminar(clave, vuelo, error=e)
+            raise
+        self.terminar(clave, vuelo, resultado)
+        return resultado
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.descargas + self.coalescidas
+            return {
+                "descargas": self.descargas,
+                "coalescidas": self.coalescidas,
+                "tasa_coalescidas": round(self.coalescidas / total, 3) if total else 0.0,
+                "en_curso": len(self._vuelos),
+            }
+
+
+vuelos = VuelosEnCurso()
+# Consultas de si una hoja cambió, también de a una por clave (con sus propias cuentas)
+vuelos_firma = VuelosEnCurso()
+
+
+class ClienteSheets:
+    """Conexión a la planilla compartida por todo el proceso.
+
+    Se autoriza una sola vez; la sesión HTTP de google-auth reutiliza las conexiones
+    y renueva el token sola. Si aun así las credenciales quedan inválidas, se
+    reconecta desde cero y se reintenta la operación una vez.
+    """
+
+    def __init__(self, spreadsheet_key=SPREADSHEET_KEY):
+        self.spreadsheet_key = spreadsheet_key
+        self._lock = threading.Lock()
+        self._libro = None
+        self._hojas = {}
+        self.conexiones = 0
+
+    def _conectar(self):
+        import gspread
+        import streamlit as st
+        from google.oauth2.service_account import Credentials
+
+        creds = Credentials.from_service_account_info(st.secrets["gspread"], scopes=SCOPES)
+        client = gspread.authorize(creds)
+        self.conexiones += 1
+        return client.open_by_key(self.spreadsheet_key)
+
+    def libro(self):
+        with self._lock:
+            if self._libro is None:
+                self._libro = self._conectar()
+                self._hojas = {}
+            return self._libro
+
+    def hoja(self, nombre):
+        libro = self.libro()
+        with self._lock:
+            if nombre not in self._hojas:
+                self._hojas[nombre] = libro.worksheet(nombre)
+            return self._hojas[nombre]
+
+    def reiniciar(self):
+        with self._lock:
+            self._libro = None
+            self._hojas = {}
+
+    def ejecutar(self, operacion):
+        """Ejecuta ``operacion(cliente)`` reconectando una vez si la autorización falló."""
+        try:
+            return operacion(self)
+        except Exception as e:
+            if not _es_error_de_autorizacion(e):
+                raise
+            self.reiniciar()
+            return operacion(self)
+
+
+def _es_error_de_autorizacion(e):
+    from google.auth.exceptions import RefreshError
+    from gspread.exceptions import APIError
+
+    if isinstance(e, RefreshError):
+        return True
+    return isinstance(e, APIError) and getattr(e.response, "status_code", None) == 401
+
+
+cliente = ClienteSheets()
+
+
+class BackendGoogle:
+    """Lee y escribe en la planilla de Google a través del cliente compartido."""
+
+    def __init__(self, cliente):
+        self.cliente = cliente
+
+    def valores(self, rangos):
+        """Valores de varios rangos A1 en una sola llamada (values.batchGet)."""
+        respuesta = self.cliente.ejecutar(lambda c: c.libro().values_batch_get(rangos))
+        return [r.get("values", []) for r in respuesta["valueRanges"]]
+
+    def firmas(self, sheet_names):
+        """Fecha de modificación de la planilla según Drive (la misma para todas sus hojas).
+
+        Es una consulta de metadatos: mucho más liviana que descargar una hoja y no
+        cuenta en la cuota de lecturas de Sheets.
+        """
+        modificada = self.cliente.ejecutar(lambda c: c.libro().get_lastUpdateTime())
+        return {nombre: modificada for nombre in sheet_names}
+
+    def agregar_filas(self, sheet_name, filas):
+        self.cliente.ejecutar(lambda c: c.hoja(sheet_name).append_rows(filas))
+
+
+class BackendLocal:
+    """Reemplazo local de la planilla: hojas en memoria, opcionalmente en archivos CSV.
+
+    Entiende los rangos A1 que usa la app (hoja entera, ``1:1``, ``A5:H``) y devuelve
+    los valores como la API (texto, sin celdas ni filas vacías al final). Sirve para
+    trabajar sin conexión y para pruebas y benchmarks.
+    """
+
+    def __init__(self, hojas=None, directorio=None):
+        self.directorio = directorio
+        self._hojas = {nombre: [self._texto(f) for f in filas] for nombre, filas in (hojas or {}).items()}
+        # Revisión de cada hoja: sube con cada cambio (hace de firma, como la fecha en Drive)
+        self._revisiones = dict.fromkeys(self._hojas, 1)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def desde_directorio(cls, directorio):
+        hojas = {}
+        if os.path.isdir(directorio):
+            for archivo in sorted(os.listdir(directorio)):
+                if archivo.endswith(".csv"):
+                    with open(os.path.join(directorio, archivo), encoding="utf-8", newline="") as f:
+                        hojas[archivo[:-4]] = list(csv.reader(f))
+        return cls(hojas, directorio)
+
+    @staticmethod
+    def _texto(fila):
+        return ["" if v is None else str(v) for v in fila]
+
+    def valores(self, rangos):
+        with self._lock:
+            return [self._leer(rango) for rango in rangos]
+
+    def _leer(self, rango):
+        m = re.fullmatch(r"'((?:[^']|'')+)'(?:!(.+))?", rango) or re.fullmatch(r"([^!]+)(?:!(.+))?", rango)
+        nombre, celdas = m.group(1).replace("''", "'"), m.group(2)
+        filas = self._hojas[nombre]
+        if celdas:
+            c1, f1, c2, f2 = re.fullmatch(r"([A-Z]*)(\d*):([A-Z]*)(\d*)", celdas).groups()
+            filas = filas[(int(f1) - 1 if f1 else 0):(int(f2) if f2 else None)]
+            desde = _indice_columna(c1) if c1 else 0
+            hasta = _indice_columna(c2) + 1 if c2 else None
+            filas = [f[desde:hasta] for f in filas]
+        filas = [_recortar(f) for f in filas]
+        while filas and not filas[-1]:
+            filas.pop()
+        return filas
+
+    def firmas(self, sheet_names):
+        with self._lock:
+            return {nombre: self._revisiones.get(nombre, 0) for nombre in sheet_names}
+
+    def agregar_filas(self, sheet_name, filas):
+        filas = [self._texto(f) for f in filas]
+        with self._lock:
+            self._hojas.setdefault(sheet_name, []).extend(filas)
+            self._revisiones[sheet_name] = self._revisiones.get(sheet_name, 0) + 1
+            if self.directorio:
+                os.makedirs(self.directorio, exist_ok=True)
+                with open(os.path.join(self.directorio, f"{sheet_name}.csv"), "a", encoding="utf-8", newline="") as f:
+                    csv.writer(f).writerows(filas)
+
+
+def _indice_columna(letras):
+    indice = 0
+    for letra in letras:
+        indice = indice * 26 + ord(letra) - ord("A") + 1
+    return indice - 1
+
+
+backend = BackendLocal.desde_directorio(DIR_OFFLINE) if OFFLINE else BackendGoogle(cliente)
+almacen = AlmacenSnapshots(os.path.join(DIR_LOCAL, "snapshots.sqlite"))
+
+# Hojas descargadas al menos una vez en este proceso (las demás pueden salir de la copia local)
+_descargadas = set()
+
+
+def usar_backend(nuevo):
+    """Cambia el origen de los datos (p.ej. por un BackendLocal) y vacía la caché."""
+    global backend, _sin_firmas
+    backend = nuevo
+    _sin_firmas = False
+    _descargadas.clear()
+    cache.invalidar()
+
+
+def _valores_a_frame(valores):
+    """Convierte los valores crudos de una hoja en un DataFrame, igual que get_all_records()."""
+    from gspread.utils import fill_gaps, numericise_all, to_records
+
+    if not valores or valores == [[]]:
+        return pd.DataFrame()
+    valores = fill_gaps(valores)
+    encabezado, filas = valores[0], valores[1:]
+    return pd.DataFrame(to_records(encabezado, [numericise_all(f) for f in filas]))
+
+
+def _recortar(fila):
+    """Quita las celdas vacías del final (la API no las devuelve)."""
+    fila = list(fila)
+    while fila and fila[-1] == "":
+        fila.pop()
+    return fila
+
+
+def _meta_cola(valores):
+    """Lo necesario para pedir después solo las filas nuevas de la hoja."""
+    if not valores or not valores[0]:
+        return None
+    return {
+        "encabezado": _recortar(valores[0]),
+        "filas": len(valores) - 1,
+        "ultima": _recortar(valores[-1]),
+        "incrementales": 0,
+    }
+
+
+def _descargar_varias(sheet_names):
+    """Descarga varias hojas completas en una sola llamada a la API (values.batchGet).
+
+    Devuelve ``{hoja: (DataFrame, meta)}``; ``meta`` solo se calcula para las hojas
+    incrementales.
+    """
+    from gspread.utils import absolute_range_name
+
+    rangos = [absolute_range_name(n) for n in sheet_names]
+    with tiempos.tramo("sheets"):
+        respuesta = backend.valores(rangos)
+    resultado = {}
+    with tiempos.tramo("parseo"):
+        for nombre, valores in zip(sheet_names, respuesta):
+            meta = _meta_cola(valores) if nombre in HOJAS_INCREMENTALES else None
+            resultado[nombre] = (_valores_a_frame(valores), meta)
+    return resultado
+
+
+def _descargar_cola(sheet_name, meta):
+    """Trae el encabezado y las filas desde la última conocida.
+
+    Devuelve la lista de filas nuevas, o None si la hoja cambió de otra forma
+    (encabezado distinto, filas editadas o borradas) y hay que recargarla entera.
+    """
+    from gspread.utils import absolute_range_name, rowcol_to_a1
+
+    ancho = len(meta["encabezado"])
+    ultima_col = rowcol_to_a1(1, ancho)[:-1]
+    # La fila de anclaje es la última que ya teníamos (o el encabezado si no había datos)
+    ancla = meta["filas"] + 1
+    rangos = [
+        absolute_range_name(sheet_name, "1:1"),
+        absolute_range_name(sheet_name, f"A{ancla}:{ultima_col}"),
+    ]
+    with tiempos.tramo("sheets"):
+        encabezado, cola = backend.valores(rangos)
+    if not encabezado or _recortar(encabezado[0]) != meta["encabezado"]:
+        return None
+    if not cola or _recortar(cola[0]) != meta["ultima"]:
+        return None
+    return cola[1:]
+
+
+def _actualizar_incremental(sheet_name, clave):
+    """Actualiza una hoja vencida agregando solo sus filas nuevas; None si no se pudo."""
+    previa = cache.anterior(clave)
+    if previa is None or not previa.meta or previa.meta["incrementales"] >= REFRESCO_COMPLETO_CADA:
+        return None
+    meta = previa.meta
+    nuevas = _descargar_cola(sheet_name, meta)
+    if nuevas is None:
+        return None
+    meta = dict(meta, incrementales=meta["incrementales"] + 1)
+    optimistas = meta.pop("optimistas", 0)
+    if not nuevas and not optimistas:
+        _descargadas.add(sheet_name)
+        return cache.renovar(clave, meta)
+    previas = meta["filas"]
+    meta.update(filas=meta["filas"] + len(nuevas), ultima=_recortar(nuevas[-1]) if nuevas else meta["ultima"])
+    with tiempos.tramo("parseo"):
+        # Las filas optimistas del final se descartan: vuelven las que siguen pendientes
+        base = previa.df.iloc[:len(previa.df) - optimistas]
+        agregado = _valores_a_frame([meta["encabezado"]] + nuevas).reindex(columns=base.columns)
+        df = pd.concat([base, agregado], ignore_index=True) if nuevas else base
+        # Memoria de la copia anterior más lo agregado (sin medir todo el DataFrame otra vez)
+        memoria = previa.bytes + _bytes(agregado) - (_bytes(previa.df.iloc[len(base):]) if optimistas else 0)
+    return _guardar(sheet_name, clave, df, meta, agregado=(agregado, previas), bytes=memoria)
+
+
+# Revisiones de hojas vencidas: cuántas seguían iguales (no se descargaron) y cuántas no.
+# Se actualizan desde las sesiones y el refrescador, con _revalidando_lock
+cambios = {"sin_cambios": 0, "con_cambios": 0}
+
+# Si la consulta de firmas falló de forma permanente (p.ej. la API de Drive no está
+# habilitada o la cuenta no tiene permiso): no se vuelve a intentar y se usa solo el TTL
+_sin_firmas = False
+
+
+def _es_permanente(e):
+    """Error que no se arregla reintentando: permiso denegado (403)."""
+    from gspread.exceptions import APIError
+
+    return isinstance(e, APIError) and getattr(e.response, "status_code", None) == 403
+
+
+def _firma_actual(sheet_name):
+    """Señal barata de cambios de la hoja según el backend, o None si no la ofrece o falla."""
+    global _sin_firmas
+    firmas = getattr(backend, "firmas", None)
+    if firmas is None or _sin_firmas:
+        return None
+    try:
+        with tiempos.tramo("firma"):
+            return firmas([sheet_name]).get(sheet_name)
+    except Exception as e:
+        if not _es_permanente(e):
+            _log.exception("No se pudo consultar si %s cambió", sheet_name)
+            return None
+        with _revalidando_lock:
+            primera, _sin_firmas = not _sin_firmas, True
+        if primera:
+            _log.warning("No se puede consultar si las hojas cambiaron (%s); se recargan al vencer", e)
+        return None
+
+
+def _renovar_sin_cambios(sheet_name, clave):
+    """Antes de volver a descargar una hoja vencida, pregunta si cambió.
+
+    Devuelve ``(entrada, firma)``: la entrada renovada si la firma es la misma que cuando
+    se descargó (None si hay que descargar) y la firma actual, para guardarla con la
+    descarga. Las marcadas con ``vencer`` se descargan sin preguntar: ahí se sabe que
+    cambió, y la fecha de Drive puede tardar en reflejarlo.
+    """
+    previa = cache.anterior(clave)
+    if previa is None or not math.isfinite(previa.obtenido):
+        return None, None
+    firma = _firma_actual(sheet_name)
+    if firma is None:
+        return None, None
+    if firma == previa.firma:
+        with _revalidando_lock:
+            cambios["sin_cambios"] += 1
+        return cache.renovar(clave), firma
+    with _revalidando_lock:
+        cambios["con_cambios"] += previa.firma is not None
+    return None, firma
+
+
+def _guardar(sheet_name, clave, df, meta, agregado=None, bytes=None):
+    """Guarda una hoja recién descargada en la caché y en la copia local.
+
+    Con ``agregado=(filas_nuevas, previas)`` (lectura incremental) a la copia local solo
+    se le agregan las filas nuevas, salvo que no tenga las ``previas`` filas esperadas.
+    """
+    entrada = _guardar_en_cache(sheet_name, clave, df, meta, bytes=bytes)
+    _descargadas.add(sheet_name)
+    if USAR_SNAPSHOTS:
+        try:
+            with tiempos.tramo("snapshot"):
+                if agregado is None or not almacen.agregar(sheet_name, agregado[0], meta, agregado[1]):
+                    almacen.guardar(sheet_name, df, meta)
+        except Exception:
+            # No poder escribir la copia local no debe romper la app
+            _log.exception("No se pudo guardar la copia local de %s", sheet_name)
+    return entrada
+
+
+# Filas ya encoladas que todavía no llegan a la hoja, por hoja ({id_fila: fila}). Se
+# agregan al final de la copia en caché para que la app las muestre de inmediato y se
+# olvidan cuando la cola las confirma (o fallan): la próxima lectura trae la de la hoja.
+_optimistas = {}
+_optimistas_lock = threading.RLock()
+
+
+def _con_optimistas(sheet_name, df, meta):
+    """``df`` con las filas optimistas pendientes de la hoja al final (y su cantidad en ``meta``)."""
+    pendientes = list(_optimistas.get(sheet_name, {}).values())
+    if meta is not None:
+        meta = dict(meta, optimistas=len(pendientes) if pendientes and len(df.columns) else 0)
+    if not pendientes or not len(df.columns):
+        return df, meta
+    agregado = _valores_a_frame([list(df.columns)] + [BackendLocal._texto(f) for f in pendientes])
+    return pd.concat([df, agregado], ignore_index=True), meta
+
+
+def _guardar_en_cache(sheet_name, clave, df, meta, obtenido=None, bytes=None):
+    with _optimistas_lock:
+        completo, meta = _con_optimistas(sheet_name, df, meta)
+        if bytes is not None and completo is not df:
+            bytes += _bytes(completo.iloc[len(df):])
+        return cache.guardar(clave, completo, meta, obtenido, bytes)
+
+
+def _desde_snapshot(sheet_name, clave):
+    """Arranque en frío: sirve la copia local de la hoja y la revalida en segundo plano."""
+    if not USAR_SNAPSHOTS or sheet_name in _descargadas:
+        return None
+    try:
+        with tiempos.tramo("snapshot"):
+            copia = almacen.leer(sheet_name)
+    except Exception:
+        _log.exception("No se pudo leer la copia local de %s", sheet_name)
+        return None
+    if copia is None:
+        return None
+    df, meta, _ = copia
+    entrada = _guardar_en_cache(sheet_name, clave, df, meta)
+    revalidar_en_fondo(sheet_name)
+    return entrada
+
+
+def recargar(sheet_name):
+    """Descarga la hoja (solo la cola si se puede) y reemplaza su entrada en la caché."""
+    clave = cache.clave(sheet_name)
+
+    def _recargar():
+        entrada, firma = _renovar_sin_cambios(sheet_name, clave)
+        if entrada is not None:
+            return entrada
+        if sheet_name in HOJAS_INCREMENTALES:
+            entrada = _actualizar_incremental(sheet_name, clave)
+        if entrada is None:
+            df, meta = _descargar_varias([sheet_name])[sheet_name]
+            entrada = _guardar(sheet_name, clave, df, meta)
+        entrada.firma = firma
+        return entrada
+
+    return vuelos.hacer(clave, _recargar)
+
+
+_revalidando = set()
+_revalidando_lock = threading.Lock()
+
+
+def _revalidar(sheet_name):
+    """``recargar`` salvo que otro hilo ya esté revalidando la hoja; True si la recargó."""
+    with _revalidando_lock:
+        if sheet_name in _revalidando:
+            return False
+        _revalidando.add(sheet_name)
+    try:
+        recargar(sheet_name)
+        return True
+    finally:
+        with _revalidando_lock:
+            _revalidando.discard(sheet_name)
+
+
+def revalidar_en_fondo(sheet_name):
+    """Lanza ``recargar`` en un hilo aparte (una sola vez por hoja a la vez)."""
+    with _revalidando_lock:
+        if sheet_name in _revalidando:
+            return
+        _revalidando.add(sheet_name)
+
+    def _tarea():
+        try:
+            recargar(sheet_name)
+        except Exception:
+            _log.exception("No se pudo revalidar %s", sheet_name)
+        finally:
+            with _revalidando_lock:
+                _revalidando.discard(sheet_name)
+
+    threading.Thread(target=_tarea, name=f"revalidar-{sheet_name}", daemon=True).start()
+
+
+class Refrescador:
+    """Hilo que vuelve a descargar las hojas más leídas antes de que venzan en la caché.
+
+    Cada hoja de ``intervalos`` se recarga cuando su entrada cumple esa edad (contando
+    también las recargas que hizo la app), siempre que alguien la haya leído en los
+    últimos ``inactividad`` segundos. Mientras tanto la caché sigue sirviendo la copia
+    anterior, y la nueva la reemplaza de una vez al guardarse.
+    """
+
+    def __init__(self, intervalos, inactividad=REFRESCO_INACTIVIDAD, espera_error=30.0):
+        self.intervalos = {h: segundos for h, segundos in intervalos.items() if segundos > 0}
+        self.inactividad = inactividad
+        self.espera_error = espera_error
+        self._usos = {}
+        self._reintentos = {}
+        self._cond = threading.Condition()
+        self._hilo = None
+        self.refrescos = 0
+        self.errores = 0
+
+    def atiende(self, sheet_name):
+        return sheet_name in self.intervalos
+
+    def usada(self, sheet_name):
+        """Registra una lectura de la hoja (y arranca el hilo la primera vez)."""
+        if sheet_name not in self.intervalos:
+            return
+        with self._cond:
+            self._usos[sheet_name] = time.monotonic()
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._trabajar, name="refrescador", daemon=True)
+                self._hilo.start()
+            # La hoja pudo cargarse recién: el hilo recalcula cuándo le toca
+            self._cond.notify()
+
+    def _proximo(self, sheet_name, ahora):
+        """Momento (monotónico) en que toca refrescar la hoja, o None si no hay que hacerlo."""
+        if ahora - self._usos.get(sheet_name, -math.inf) > self.inactividad:
+            return None
+        entrada = cache.anterior(cache.clave(sheet_name))
+        if entrada is None:
+            # Sin copia (recién invalidada): la descarga la próxima lectura
+            return None
+        return max(entrada.obtenido + self.intervalos[sheet_name], self._reintentos.get(sheet_name, -math.inf))
+
+    def _trabajar(self):
+        while True:
+            with self._cond:
+                ahora = time.monotonic()
+                proximos = {h: self._proximo(h, ahora) for h in list(self._usos)}
+                vencidas = [h for h, t in proximos.items() if t is not None and t <= ahora]
+                if not vencidas:
+                    pendientes = [t for t in proximos.values() if t is not None]
+                    # Sin nada programado se espera a la próxima lectura (o se revisa cada tanto)
+                    self._cond.wait(timeout=min(pendientes) - ahora if pendientes else self.espera_error)
+                    continue
+            for hoja in vencidas:
+                try:
+                    if _revalidar(hoja):
+                        self.refrescos += 1
+                        self._reintentos.pop(hoja, None)
+                    else:
+                        # Otro hilo la está revalidando: se vuelve a mirar en un momento
+                        self._reintentos[hoja] = time.monotonic() + 1.0
+                except Exception:
+                    self.errores += 1
+                    self._reintentos[hoja] = time.monotonic() + self.espera_error
+                    _log.exception("No se pudo refrescar %s", hoja)
+
+
+refrescador = Refrescador(REFRESCO_HOJAS if REFRESCO_ACTIVO else {})
+
+
+def agregar_filas(sheet_name, filas):
+    """Agrega filas al final de la hoja en una sola llamada."""
+    backend.agregar_filas(sheet_name, filas)
+
+
+def registrar_fila(sheet_name, fila):
+    """Encola una fila para la hoja y la agrega ya a la copia en caché (escritura optimista).
+
+    Las vistas derivadas ven una versión nueva de la hoja al instante, sin descargarla.
+    Cuando la cola confirma la fila, la caché se reconcilia con la hoja en la próxima
+    lectura. Devuelve el identificador del registro (ver ``ColaEscritura.estado``).
+    """
+    # La cola se obtiene antes del candado (cola_escritura toma _colas_lock y luego este)
+    cola = cola_escritura(sheet_name)
+    with _optimistas_lock:
+        # Primero se encola: si falla, no queda en la vista una fila que nunca se enviará.
+        # La cola olvida las optimistas con este mismo candado, así que no puede confirmar
+        # la fila antes de que se agregue aquí
+        id_fila = cola.encolar(fila)
+        _optimistas.setdefault(sheet_name, OrderedDict())[id_fila] = fila
+        previa = cache.anterior(cache.clave(sheet_name))
+        if previa is not None and len(previa.df.columns):
+            meta = previa.meta
+            if meta is not None:
+                meta = dict(meta, optimistas=meta.get("optimistas", 0) + 1)
+            agregado = _valores_a_frame([list(previa.df.columns), BackendLocal._texto(fila)])
+            # Misma edad y firma que la copia anterior: sigue venciendo cuando le toca. La
+            # memoria se suma a la anterior, sin medir de nuevo todo el DataFrame.
+            entrada = cache.guardar(cache.clave(sheet_name), pd.concat([previa.df, agregado], ignore_index=True),
+                                    meta, previa.obtenido, previa.bytes + _bytes(agregado))
+            entrada.firma = previa.firma
+    return id_fila
+
+
+def _olvidar_optimistas(sheet_name, ids):
+    with _optimistas_lock:
+        pendientes = _optimistas.get(sheet_name)
+        for id_fila in ids:
+            if pendientes:
+                pendientes.pop(id_fila, None)
+
+
+def _es_reintentable(e):
+    """Errores pasajeros: tiempo agotado (408), límite de cuota (429), errores del servidor
+    o de red, incluidos los de google-auth al renovar el token (no heredan de requests)."""
+    import requests
+    from google.auth.exceptions import RefreshError, TransportError
+    from gspread.exceptions import APIError
+
+    if isinstance(e, APIError):
+        codigo = getattr(e.response, "status_code", 0)
+        return codigo in (408, 429) or codigo >= 500
+    if isinstance(e, TransportError):
+        return True
+    if isinstance(e, RefreshError):
+        return bool(getattr(e, "retryable", False))
+    return isinstance(e, (requests.ConnectionError, requests.Timeout))
+
+
+class ColaEscritura:
+    """Filas por agregar a una hoja, enviadas en segundo plano y en lotes.
+
+    Cada fila se guarda primero en un archivo local (``ruta``), así que un reinicio de
+    la app no la pierde: al volver a crear la cola se reenvían las que quedaron. Un hilo
+    junta lo que llega durante ``espera_lote`` segundos (o hasta ``max_lote`` filas), lo
+    manda con ``append_rows`` y, ante errores pasajeros (ver ``_es_reintentable``),
+    reintenta con espera exponencial. Las filas con un error permanente se vuelven a
+    intentar cada ``espera_fallidas`` segundos (el doble cada vez, hasta
+    ``espera_fallidas_max``). El envío es "al menos una vez": si la app se cae justo
+    después de escribir en la hoja, esa fila podría repetirse.
+    """
+
+    PENDIENTE, CONFIRMADO, ERROR = "pendiente", "confirmado", "error"
+
+    def __init__(self, sheet_name, ruta, enviar=None, espera_lote=0.5, max_lote=500,
+                 espera_base=1.0, espera_max=60.0, espera_fallidas=300.0,
+                 espera_fallidas_max=3600.0, max_estados=1000):
+        self.sheet_name = sheet_name
+        self.ruta = ruta
+        self._enviar = enviar or (lambda filas: agregar_filas(sheet_name, filas))
+        self.espera_lote = espera_lote
+        self.max_lote = max_lote
+        self.espera_base = espera_base
+        self.espera_max = espera_max
+        self.espera_fallidas = espera_fallidas
+        self.espera_fallidas_max = espera_fallidas_max
+        self.max_estados = max_estados
+        self._pendientes = OrderedDict()
+        self._estados = OrderedDict()
+        self._errores = {}
+        self._fallidas = {}
+        self._reintento_fallidas = None
+        self._espera_fallidas_actual = espera_fallidas
+        self._cond = threading.Condition()
+        self._hilo = None
+        self.enviadas = 0
+        self.reintentos = 0
+        self._cargar_archivo()
+        if self._pendientes:
+            self._arrancar()
+
+    def encolar(self, fila, id_fila=None):
+        """Agrega una fila a la cola y devuelve su identificador."""
+        id_fila = id_fila or uuid.uuid4().hex
+        with self._cond:
+            # Valores de numpy/pandas a tipos de Python (para el JSON del archivo y de la API)
+            self._pendientes[id_fila] = [v.item() if hasattr(v, "item") else v for v in fila]
+            self._marcar(id_fila, self.PENDIENTE)
+            self._guardar_archivo()
+            self._arrancar()
+            # Solo se despierta al hilo si estaba sin nada que enviar (para que empiece a
+            # juntar el lote) o si el lote ya se llenó; si no, seguiría juntando de todos modos
+            if len(self._pendientes) == 1 or len(self._pendientes) >= self.max_lote:
+                self._cond.notify()
+        return id_fila
+
+    def estado(self, id_fila):
+        with self._cond:
+            return self._estados.get(id_fila)
+
+    def error(self, id_fila):
+        with self._cond:
+            return self._errores.get(id_fila)
+
+    def pendientes(self):
+        with self._cond:
+            return len(self._pendientes)
+
+    def filas_pendientes(self):
+        """``{id_fila: fila}`` de lo que todavía no se envió."""
+        with self._cond:
+            return OrderedDict(self._pendientes)
+
+    def _marcar(self, id_fila, estado):
+        self._estados[id_fila] = estado
+        self._estados.move_to_end(id_fila)
+        while len(self._estados) > self.max_estados:
+            viejo, _ = self._estados.popitem(last=False)
+            self._errores.pop(viejo, None)
+
+    def _arrancar(self):
+        if self._hilo is None or not self._hilo.is_alive():
+            self._hilo = threading.Thread(target=self._trabajar, name=f"cola-{self.sheet_name}", daemon=True)
+            self._hilo.start()
+
+    def _esperar_pendientes(self):
+        """Espera (con el lock tomado) a que haya algo que enviar; al llegar la hora, las
+        filas fallidas vuelven a la cola, antes que las nuevas."""
+        while True:
+            ahora = time.monotonic()
+            if self._fallidas and ahora >= self._reintento_fallidas:
+                reintentar = OrderedDict(self._fallidas)
+                for id_fila in reintentar:
+                    self._marcar(id_fila, self.PENDIENTE)
+                    self._errores.pop(id_fila, None)
+                reintentar.update(self._pendientes)
+                self._pendientes = reintentar
+                self._fallidas = {}
+            if self._pendientes:
+                return
+            self._cond.wait(timeout=self._reintento_fallidas - ahora if self._fallidas else None)
+
+    def _trabajar(self):
+        intentos = 0
+        while True:
+            with self._cond:
+                self._esperar_pendientes()
+                # Esperar un poco para juntar en un mismo lote los registros simultáneos
+                limite = time.monotonic() + self.espera_lote
+                while len(self._pendientes) < self.max_lote and time.monotonic() < limite:
+                    self._cond.wait(timeout=limite - time.monotonic())
+                lote = list(self._pendientes.items())[:self.max_lote]
+            try:
+                self._enviar([fila for _, fila in lote])
+            except Exception as e:
+                if _es_reintentable(e):
+                    espera = min(self.espera_max, self.espera_base * 2 ** intentos)
+                    intentos += 1
+                    self.reintentos += 1
+                    time.sleep(espera * random.uniform(0.5, 1.0))
+                    continue
+                # Error permanente: queda en el archivo local y se vuelve a intentar más
+                # tarde (cada vez con más espera) o al reiniciar la app
+                with self._cond:
+                    for id_fila, fila in lote:
+                        self._pendientes.pop(id_fila, None)
+                        self._fallidas[id_fila] = fila
+                        self._marcar(id_fila, self.ERROR)
+                        self._errores[id_fila] = str(e)
+                    self._reintento_fallidas = time.monotonic() + self._espera_fallidas_actual
+                    self._espera_fallidas_actual = min(self.espera_fallidas_max, 2 * self._espera_fallidas_actual)
+                    self._guardar_archivo()
+                # La fila no llegó a la hoja: deja de mostrarse en la próxima lectura
+                _olvidar_optimistas(self.sheet_name, [id_fila for id_fila, _ in lote])
+                cache.vencer(self.sheet_name)
+                intentos = 0
+                continue
+            intentos = 0
+            with self._cond:
+                for id_fila, _ in lote:
+                    self._pendientes.pop(id_fila, None)
+                    self._marcar(id_fila, self.CONFIRMADO)
+                self.enviadas += len(lote)
+                self._espera_fallidas_actual = self.espera_fallidas
+                self._guardar_archivo()
+            # La hoja cambió: la próxima lectura trae las filas nuevas (en vez de las optimistas)
+            _olvidar_optimistas(self.sheet_name, [id_fila for id_fila, _ in lote])
+            cache.vencer(self.sheet_name)
+
+    def _cargar_archivo(self):
+        if not os.path.exists(self.ruta):
+            return
+        with open(self.ruta, encoding="utf-8") as f:
+            for linea in f:
+                if linea.strip():
+                    item = json.loads(linea)
+                    self._pendientes[item["id"]] = item["fila"]
+                    self._marcar(item["id"], self.PENDIENTE)
+
+    def _guardar_archivo(self):
+        """Reescribe el archivo con lo no confirmado (incluye las filas con error)."""
+        no_confirmadas = list(self._pendientes.items()) + list(self._fallidas.items())
+        os.makedirs(os.path.dirname(self.ruta) or ".", exist_ok=True)
+        temporal = self.ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            for id_fila, fila in no_confirmadas:
+                f.write(json.dumps({"id": id_fila, "fila": fila}, ensure_ascii=False) + "\n")
+        os.replace(temporal, self.ruta)
+
+
+_colas = {}
+_colas_lock = threading.Lock()
+# Hojas cuya cola de una ejecución anterior ya se buscó (ver _reanudar_cola)
+_colas_revisadas = set()
+
+
+def _ruta_cola(sheet_name):
+    return os.path.join(DIR_LOCAL, f"cola_{sheet_name}.jsonl")
+
+
+def cola_escritura(sheet_name):
+    """Cola de escritura de una hoja, compartida por todas las sesiones del proceso."""
+    with _colas_lock:
+        if sheet_name not in _colas:
+            _colas[sheet_name] = ColaEscritura(sheet_name, _ruta_cola(sheet_name))
+            # Lo que quedó sin enviar de una ejecución anterior también se muestra
+            with _optimistas_lock:
+                pendientes = _colas[sheet_name].filas_pendientes()
+                _optimistas.setdefault(sheet_name, OrderedDict()).update(pendientes)
+            if pendientes:
+                cache.vencer(sheet_name)
+        return _colas[sheet_name]
+
+
+def _reanudar_cola(sheet_name):
+    """La primera vez que se lee una hoja, crea su cola si quedó un archivo de la ejecución
+    anterior: así las filas sin enviar se reenvían y se muestran sin esperar un registro."""
+    if sheet_name in _colas_revisadas:
+        return
+    _colas_revisadas.add(sheet_name)
+    if os.path.exists(_ruta_cola(sheet_name)):
+        try:
+            cola_escritura(sheet_name)
+        except Exception:
+            # Un archivo de cola ilegible no debe impedir leer la hoja
+            _log.exception("No se pudo reanudar la cola de %s", sheet_name)
+
+
+def cargar_hojas(sheet_names, copiar=True, con_version=False):
+    """Devuelve ``{hoja: DataFrame}``; las hojas que no están en caché se piden juntas.
+
+    Con ``copiar=False`` se entregan los DataFrames de la caché, que no deben modificarse.
+    Con ``con_version=True`` devuelve ``{hoja: (DataFrame, version)}``, con la versión (ver
+    ``version_datos``) de esa misma copia: leerla después con ``version_datos`` puede dar
+    la de una copia más nueva si otro hilo la reemplazó entremedio.
+    """
+    entradas, faltantes, firmas, claves = {}, {}, {}, {}
+    for nombre in sheet_names:
+        _reanudar_cola(nombre)
+        refrescador.usada(nombre)
+        clave = claves[nombre] = cache.clave(nombre)
+        entrada = cache.obtener(clave)
+        if entrada is None and refrescador.atiende(nombre):
+            # Vencida: se sirve igual y se revalida en segundo plano
+            entrada = cache.vencida(clave)
+            if entrada is not None:
+                revalidar_en_fondo(nombre)
+        if entrada is None and cache.anterior(clave) is not None:
+            # Vencida pero quizás sin cambios: basta con renovarla (una consulta por hoja)
+            entrada, firmas[nombre] = vuelos_firma.hacer(clave, lambda: _renovar_sin_cambios(nombre, clave))
+        if entrada is None and nombre in HOJAS_INCREMENTALES:
+            entrada = vuelos.hacer(clave, lambda: _actualizar_incremental(nombre, clave))
+            if entrada is not None:
+                entrada.firma = firmas.get(nombre)
+        if entrada is None:
+            entrada = _desde_snapshot(nombre, clave)
+        if entrada is None:
+            faltantes[nombre] = clave
+        else:
+            entradas[nombre] = entrada
+    if faltantes:
+        for nombre, entrada in _descargar_faltantes(faltantes).items():
+            entrada.firma = firmas.get(nombre)
+            entradas[nombre] = entrada
+    # Copias: las secciones modifican los DataFrames y la caché es compartida
+    dfs = {nombre: entradas[nombre].df if not copiar else entradas[nombre].df.copy() for nombre in sheet_names}
+    if con_version:
+        return {nombre: (df, (claves[nombre][1], entradas[nombre].generacion)) for nombre, df in dfs.items()}
+    return dfs
+
+
+def _descargar_faltantes(faltantes):
+    """Descarga ``{hoja: clave}`` en una sola llamada, salvo las que otro hilo ya está
+    descargando: de esas se espera su resultado. Devuelve ``{hoja: entrada}``."""
+    propias, ajenas, entradas = {}, {}, {}
+    for nombre, clave in faltantes.items():
+        vuelo, lider = vuelos.tomar(clave)
+        if not lider:
+            ajenas[nombre] = vuelo
+            continue
+        # Pudo terminar otra descarga entre el fallo de caché y tomar el vuelo
+        entrada = cache.obtener(clave, contar=False)
+        if entrada is not None:
+            vuelos.terminar(clave, vuelo, entrada, descargo=False)
+            entradas[nombre] = entrada
+        else:
+            propias[nombre] = vuelo
+    if propias:
+        try:
+            for nombre, (df, meta) in _descargar_varias(list(propias)).items():
+                entradas[nombre] = _guardar(nombre, faltantes[nombre], df, meta)
+                vuelos.terminar(faltantes[nombre], propias.pop(nombre), entradas[nombre])
+        except BaseException as e:
+            for nombre, vuelo in propias.items():
+                vuelos.terminar(faltantes[nombre], vuelo, error=e)
+            raise
+    for nombre, vuelo in ajenas.items():
+        entrada = vuelo.esperar()
+        if entrada is None:
+            # Era una lectura incremental que no se pudo hacer: falta la descarga completa
+            entrada = _descargar_faltantes({nombre: faltantes[nombre]})[nombre]
+        entradas[nombre] = entrada
+    return entradas
+
+
+def cargar_hoja(sheet_name, copiar=True):
+    """Devuelve una copia del DataFrame de la hoja, descargándola solo si hace falta."""
+    return cargar_hojas([sheet_name], copiar)[sheet_name]
+
+
+def version_datos(sheet_name):
+    return cache.version_datos(sheet_name)
+
+
+def meta_hoja(sheet_name, version=None):
+    """Datos de la última descarga de una hoja incremental (filas, última fila y cuántas
+    actualizaciones incrementales lleva desde la última descarga completa), o None.
+
+    Con ``version`` solo se entregan si la copia en caché sigue siendo esa.
+    """
+    clave = cache.clave(sheet_name)
+    entrada = cache.anterior(clave)
+    if entrada is None or not entrada.meta:
+        return None
+    if version is not None and version != (clave[1], entrada.generacion):
+        return None
+    return dict(entrada.meta)
+
+
+def invalidar(sheet_name=None):
+    """Descarta la copia en caché de una hoja (o de todas); se vuelve a descargar al leerla."""
+    cache.invalidar(sheet_name)
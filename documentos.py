@@ -0,0 +1,127 @@
+"""Las hojas de texto de la app como documentos: agrupadas por tema para cada sección y
+con una sola búsqueda sobre todas ellas."""
+import numpy as np
+
+import busqueda
+
+
+class Fuente:
+    """Cómo se ve una hoja como documentos.
+
+    ``grupo`` es la columna por la que se agrupa en su sección (tema, tipo de acuerdo),
+    ``titulo`` y ``texto`` lo que se muestra de cada fila, ``columnas`` dónde se busca y
+    ``orden`` (opcional) la columna que ordena las filas dentro de cada grupo.
+    """
+
+    def __init__(self, hoja, grupo, titulo, texto, columnas, orden=None, url=None):
+        self.hoja = hoja
+        self.grupo = grupo
+        self.titulo = titulo
+        self.texto = texto
+        self.columnas = list(columnas)
+        self.orden = orden
+        self.url = url
+
+
+FUENTES = {
+    "Acuerdos de convivencia (internos)": Fuente(
+        "acuerdos_internos", grupo="Tema", titulo="Número de orden", texto="Acuerdo",
+        columnas=["Tema", "Acuerdo"], orden="Número de orden",
+    ),
+    "Acuerdos Comunicación Externa": Fuente(
+        "actuerdos_externos", grupo="Tipo de acuerdo", titulo="Aspecto específico", texto="Detalle del acuerdo",
+        columnas=["Tipo de acuerdo", "Aspecto específico", "Detalle del acuerdo"],
+    ),
+    "Links claves": Fuente(
+        "links", grupo="Tema", titulo="Nombre", texto="Descripción",
+        columnas=["Nombre", "Descripción", "Tema", "Detalle", "Pétalo", "Tipo"], url="URL",
+    ),
+    "Checklist de semanerx": Fuente(
+        "tareas_semaneros", grupo="Tema", titulo="Zona", texto="Tarea", columnas=["Tema", "Zona", "Tarea"],
+    ),
+}
+
+HOJAS = [fuente.hoja for fuente in FUENTES.values()]
+
+
+def _texto(valor):
+    return "" if valor is None else str(valor)
+
+
+def agrupar(fuente, df):
+    """``{grupo: DataFrame}`` de la hoja ``df`` en una sola pasada.
+
+    Los grupos quedan en el orden en que aparecen en la hoja y sus filas, ordenadas por
+    ``fuente.orden`` (si tiene). Las filas sin grupo se omiten.
+    """
+    indices = df.groupby(fuente.grupo, sort=False, observed=True).indices
+    grupos = {}
+    for grupo in df[fuente.grupo].unique():
+        if grupo not in indices:
+            continue
+        subset = df.iloc[indices[grupo]]
+        grupos[grupo] = subset if fuente.orden is None else subset.sort_values(fuente.orden, kind="stable")
+    return grupos
+
+
+class AlmacenDocumentos:
+    """Las filas de las hojas de ``FUENTES`` (ya tipadas) con una búsqueda común.
+
+    Se arma una vez por versión de los datos y solo lo usa la búsqueda de la portada; las
+    secciones agrupan su propia hoja con ``agrupar``. Una hoja que falta en ``hojas`` se omite.
+    """
+
+    def __init__(self, hojas):
+        self.documentos = []
+        secciones = []
+        filas_busqueda = []
+        for seccion, fuente in FUENTES.items():
+            df = hojas.get(fuente.hoja)
+            if df is None:
+                continue
+            faltan = [c for c in [fuente.grupo, fuente.titulo, fuente.texto] + fuente.columnas if c not in df.columns]
+            if faltan:
+                df = df.assign(**dict.fromkeys(faltan, ""))
+            columnas = list(df.columns)
+            for valores in df.itertuples(index=False, name=None):
+                fila = dict(zip(columnas, valores))
+                self.documentos.append({
+                    "seccion": seccion,
+                    "grupo": _texto(fila[fuente.grupo]),
+                    "titulo": _texto(fila[fuente.titulo]),
+                    "texto": _texto(fila[fuente.texto]),
+                    "url": _texto(fila.get(fuente.url)) if fuente.url else "",
+                })
+                filas_busqueda.append(tuple(fila[c] for c in fuente.columnas))
+            secciones.extend([seccion] * len(df))
+        self.secciones = np.array(secciones, dtype=object)
+        self.textos = busqueda.TextosBusqueda(filas_busqueda)
+
+    def __len__(self):
+        return len(self.documentos)
+
+    def buscar(self, consulta, por_seccion=20):
+        """Busca ``consulta`` (con aproximación) en todas las secciones.
+
+        Devuelve ``(resultados, conteos)``: por sección, los ``por_seccion`` documentos más
+        parecidos (cada uno con su ``puntaje``, el mejor primero) y cuántos coincidieron en
+        total. Las secciones sin coincidencias no aparecen.
+        """
+        ql = consulta.strip().lower()
+        if not ql:
+            return {}, {}
+        # Qué filas coinciden (sin puntuarlas) y, por sección, solo las mejores entre esas
+        coinciden = np.zeros(len(self.documentos), dtype=bool)
+        coinciden[self.textos.buscar(ql)] = True
+        resultados, conteos = {}, {}
+        for seccion in FUENTES:
+            permitidas = coinciden & (self.secciones == seccion)
+            conteo = int(permitidas.sum())
+            if not conteo:
+                continue
+            conteos[seccion] = conteo
+            resultados[seccion] = [
+                dict(self.documentos[posicion], puntaje=puntaje)
+                for posicion, puntaje in self.textos.mejores(ql, por_seccion, permitidas=permitidas)
+            ]
+        return resultados, conteos
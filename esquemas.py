@@ -0,0 +1,105 @@
+"""Esquemas de las hojas: alias de columnas, limpieza y columnas derivadas (todo vectorizado)."""
+import numpy as np
+import pandas as pd
+
+import tareas
+
+MESES = {
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4, "mayo": 5, "junio": 6,
+    "julio": 7, "agosto": 8, "septiembre": 9, "setiembre": 9, "octubre": 10,
+    "noviembre": 11, "diciembre": 12,
+}
+
+
+def entero(serie):
+    """Texto a número entero (truncado); lo que no es número queda NaN."""
+    numeros = pd.to_numeric(serie.astype(str).str.strip(), errors="coerce")
+    return np.trunc(numeros.replace([np.inf, -np.inf], np.nan))
+
+
+def fecha_es(serie):
+    """Fechas escritas con meses en español ("25 julio 2025", "2 de marzo de 2025")."""
+    texto = serie.astype(str).str.strip().str.lower().str.replace("de ", "", regex=False)
+    partes = texto.str.extract(r"^(\d+)\s+(\S+)\s+(\d+)(?!\S)")
+    return pd.to_datetime(
+        pd.DataFrame({
+            "year": pd.to_numeric(partes[2]),
+            "month": partes[1].map(MESES),
+            "day": pd.to_numeric(partes[0]),
+        }),
+        errors="coerce",
+    )
+
+
+def primero_de_enero(anios):
+    """1 de enero de cada año (NaT donde no hay año)."""
+    return pd.to_datetime(pd.DataFrame({"year": anios, "month": 1, "day": 1}), errors="coerce")
+
+
+def dominio(urls):
+    """Dominio de cada enlace, sin "www." (vacío si no tiene esquema://dominio)."""
+    netloc = urls.astype(str).str.extract(r"^(?:[A-Za-z][A-Za-z0-9+.\-]*:)?//([^/?#]*)", expand=False)
+    return netloc.fillna("").str.replace("www.", "", regex=False)
+
+
+class Esquema:
+    """Cómo leer una hoja.
+
+    ``alias`` renombra variantes de encabezados, ``texto`` son columnas que deben existir
+    y quedan como texto sin espacios sobrantes, y ``derivar`` recibe el DataFrame ya
+    limpio y agrega columnas tipadas.
+    """
+
+    def __init__(self, alias=None, texto=(), derivar=None):
+        self.alias = alias or {}
+        self.texto = list(texto)
+        self.derivar = derivar
+
+    def aplicar(self, df):
+        df = df.copy()
+        df.columns = [str(col).strip() for col in df.columns]
+        df = df.rename(columns={k: v for k, v in self.alias.items() if k in df.columns})
+        for col in self.texto:
+            df[col] = df[col].astype(str).str.strip() if col in df.columns else ""
+        if self.derivar is not None:
+            df = self.derivar(df)
+        return df
+
+
+def _derivar_links(df):
+    df["Pétalo"] = df["Pétalo"].str.title()
+    df["Año_int"] = entero(df["Año"])
+    # Si no hay fecha, usar 1-enero del año (si existe)
+    fecha = fecha_es(df["Fecha creación"])
+    df["Fecha_dt"] = fecha.fillna(primero_de_enero(df["Año_int"]))
+    df["Dominio"] = dominio(df["URL"])
+    return df
+
+
+ESQUEMAS = {
+    "links": Esquema(
+        alias={
+            "Petalo": "Pétalo",
+            "Fecha creacion": "Fecha creación",
+            "Anio": "Año",
+            "Descripcion": "Descripción",
+            "url": "URL", "Url": "URL",
+        },
+        texto=["Pétalo", "Tema", "Detalle", "Tipo", "Fecha creación", "Año", "Nombre", "Descripción", "URL"],
+        derivar=_derivar_links,
+    ),
+    "acuerdos_internos": Esquema(alias={"Orden": "Número de orden"}),
+    "actuerdos_externos": Esquema(alias={
+        "Acuerdo": "Tipo de acuerdo",
+        "Aspecto": "Aspecto específico",
+        "Detalle": "Detalle del acuerdo",
+    }),
+    "tareas_semaneros": Esquema(texto=["Tema", "Zona", "Tarea"], derivar=tareas.normalizar_tareas),
+    "estado_tareas": Esquema(derivar=tareas.normalizar_estado),
+}
+
+
+def normalizar(hoja, df):
+    """DataFrame tipado de una hoja según su esquema (sin esquema, solo una copia)."""
+    esquema = ESQUEMAS.get(hoja)
+    return esquema.aplicar(df) if esquema is not None else df.copy()
@@ -0,0 +1,349 @@
+"""Cálculos del checklist de semanerxs sobre las hojas tareas_semaneros y estado_tareas."""
+import bisect
+import datetime
+import threading
+import zlib
+
+import numpy as np
+import pandas as pd
+
+FORMATO_FECHA = "%Y-%m-%d %H:%M"
+COLUMNAS_ESTADO = ["Fecha", "Usuario", "Tema", "Zona", "Tarea", "Completada", "Porcentaje", "Observaciones"]
+# Columnas con pocos valores distintos que se repiten en cada fila
+CATEGORICAS_ESTADO = ["Usuario", "Tema", "Zona"]
+# Tramos de avance de un registro en el cubo de aportes
+TRAMOS = ["completa", "en_proceso", "sin_avance"]
+
+
+def ids_tarea(df, usar_id=True):
+    """ID entero estable de cada tarea.
+
+    Si la hoja tiene la columna ``ID_tarea`` (y ``usar_id``) se usa ese número; donde
+    falta, el ID es el crc32 de ``Zona`` y ``Tarea`` (sin espacios sobrantes), que es el
+    mismo en todas las sesiones y en las dos hojas. Con ``ID_tarea`` en ambas hojas,
+    cambiar la redacción de una tarea no rompe su historial; si solo una la tiene, las
+    dos deben usar el crc32 (ver ``ids_de_hoja``).
+    """
+    claves = df["Zona"].astype(str).str.strip() + "\x1f" + df["Tarea"].astype(str).str.strip()
+    codigos, unicas = pd.factorize(claves)
+    # crc32 una vez por texto distinto, no por fila
+    ids = pd.Series(np.array([zlib.crc32(c.encode("utf-8")) for c in unicas], dtype="int64")[codigos],
+                    index=df.index)
+    if usar_id and "ID_tarea" in df.columns:
+        ids = pd.to_numeric(df["ID_tarea"], errors="coerce").fillna(ids)
+    return ids.astype("int64")
+
+
+def ids_de_hoja(columnas_tareas, columnas_estado):
+    """True si las dos hojas tienen la columna ``ID_tarea`` y sus IDs se pueden cruzar.
+
+    Si solo una la tiene (una migración a medias), sus números no coinciden con el crc32
+    de la otra y el avance de las tareas desaparecería: ahí ambas usan el crc32.
+    """
+    return all("ID_tarea" in {str(c).strip() for c in columnas} for columnas in (columnas_tareas, columnas_estado))
+
+
+def normalizar_tareas(df):
+    """Catálogo de tareas con ``ID_tarea`` y ``Tema``/``Zona`` categóricas.
+
+    También deja armados ``tarea_id`` (clave de los widgets del checklist) y ``etiqueta``
+    (texto del checkbox), que así se calculan una vez por versión y no en cada recarga.
+    """
+    df["ID_tarea"] = ids_tarea(df)
+    zona, tarea = df["Zona"].astype(str), df["Tarea"].astype(str)
+    df["tarea_id"] = zona + " - " + tarea
+    df["etiqueta"] = "**" + zona + "**: " + tarea
+    for col in ("Tema", "Zona"):
+        df[col] = df[col].astype("category")
+    return df
+
+
+def clave_semana(fecha):
+    """Semana ISO como entero ``año*100 + semana`` (p.ej. 202531)."""
+    anio, semana, _ = fecha.isocalendar()
+    return anio * 100 + semana
+
+
+def lunes_semana(clave):
+    """Lunes 00:00 de la semana ISO ``clave`` (lo inverso de ``clave_semana``)."""
+    return datetime.datetime.fromisocalendar(clave // 100, clave % 100, 1)
+
+
+def limites_semana(fecha):
+    """Lunes 00:00 de la semana de ``fecha`` y el lunes siguiente."""
+    inicio = datetime.datetime.combine(fecha - datetime.timedelta(days=fecha.weekday()), datetime.time.min)
+    return inicio, inicio + datetime.timedelta(days=7)
+
+
+def normalizar_estado(df, usar_id=True):
+    """Convierte los registros crudos de estado_tareas en un DataFrame tipado.
+
+    Parsea ``Fecha`` una sola vez y agrega ``Año`` y ``Semana`` ISO, ``ClaveSemana``
+    (año*100+semana), ``Porcentaje`` entero e ``ID_tarea`` (ver ``ids_tarea``); las
+    columnas de ``CATEGORICAS_ESTADO`` quedan como categorías. El índice es la fecha
+    parseada, ordenada, para que los filtros por rango sean búsquedas binarias. Los
+    registros con una fecha que no se puede leer se descartan.
+    """
+    df = df.copy()
+    df.columns = [str(col).strip() for col in df.columns]
+    for col in COLUMNAS_ESTADO:
+        if col not in df.columns:
+            df[col] = ""
+
+    fechas = pd.to_datetime(df["Fecha"].astype(str), format=FORMATO_FECHA, errors="coerce")
+    df = df[fechas.notna().to_numpy()]
+    fechas = fechas[fechas.notna()]
+    iso = fechas.dt.isocalendar()
+    df["Año"] = iso["year"].astype(int).to_numpy()
+    df["Semana"] = iso["week"].astype(int).to_numpy()
+    df["ClaveSemana"] = df["Año"] * 100 + df["Semana"]
+    df["Porcentaje"] = pd.to_numeric(df["Porcentaje"], errors="coerce").fillna(0).astype(int)
+    df["ID_tarea"] = ids_tarea(df, usar_id)
+    for col in CATEGORICAS_ESTADO:
+        df[col] = df[col].astype(str).str.strip().astype("category")
+
+    df.index = pd.DatetimeIndex(fechas.to_numpy(), name="Fecha_dt")
+    return df.sort_index(kind="stable")
+
+
+def semanas_entre(inicio, fin):
+    """Claves de todas las semanas ISO de ``inicio`` a ``fin``, en orden (con o sin registros)."""
+    lunes = inicio - datetime.timedelta(days=inicio.weekday())
+    claves = []
+    while lunes <= fin:
+        claves.append(clave_semana(lunes))
+        lunes += datetime.timedelta(days=7)
+    return claves
+
+
+def etiqueta_semana(clave):
+    """``202531`` -> ``"2025-S31"``."""
+    return f"{clave // 100}-S{clave % 100:02d}"
+
+
+def conteo_aportes(df_estado):
+    """Registros por ``(ClaveSemana, Tema, Usuario, Tramo)`` de estado_tareas ya normalizado."""
+    tramo = np.select(
+        [df_estado["Porcentaje"].to_numpy() >= 100, df_estado["Porcentaje"].to_numpy() > 0], TRAMOS[:2], TRAMOS[2],
+    )
+    return df_estado.groupby(
+        [df_estado["ClaveSemana"].to_numpy(), df_estado["Tema"].astype(str).to_numpy(),
+         df_estado["Usuario"].astype(str).to_numpy(), tramo],
+    ).size().rename_axis(["ClaveSemana", "Tema", "Usuario", "Tramo"])
+
+
+def filtrar_rango(df_estado, inicio, fin):
+    """Registros con fecha en ``[inicio, fin]`` (búsqueda binaria sobre el índice ordenado)."""
+    desde = df_estado.index.searchsorted(pd.Timestamp(inicio), side="left")
+    hasta = df_estado.index.searchsorted(pd.Timestamp(fin), side="right")
+    return df_estado.iloc[desde:hasta]
+
+
+def avance_maximo(df_estado):
+    """``{(id_tarea, usuario, clave_semana): porcentaje máximo}`` calculado en un solo groupby."""
+    if df_estado.empty:
+        return {}
+    grupos = df_estado.groupby(["ID_tarea", "Usuario", "ClaveSemana"], sort=False, observed=True)
+    return grupos["Porcentaje"].max().to_dict()
+
+
+def fila_registro(registro, columnas=None):
+    """Fila para agregar a estado_tareas a partir de ``{columna: valor}``.
+
+    Si la hoja tiene la columna ``ID_tarea`` se sigue su encabezado, en su orden (así el
+    registro guarda el ID); si no, el orden de ``COLUMNAS_ESTADO``. Los nombres del
+    encabezado se comparan sin espacios sobrantes, como al leer la hoja.
+    """
+    columnas = [str(col).strip() for col in columnas or []]
+    if "ID_tarea" not in columnas:
+        return [registro[col] for col in COLUMNAS_ESTADO]
+    return [registro.get(col, "") for col in columnas]
+
+
+def preparar_checklist(df_pendientes, avance, usuario, semana):
+    """Tareas pendientes (de ``normalizar_tareas``) con lo necesario para pintar el
+    checklist sin filtrar por fila.
+
+    Agrega ``avance`` (porcentaje ya registrado por ``usuario`` en la ``semana``) y, a
+    las tareas en proceso, el avance en su ``etiqueta``.
+    """
+    df = df_pendientes[["Tema", "Zona", "Tarea", "ID_tarea", "tarea_id", "etiqueta"]].copy()
+    df["avance"] = [avance.get((i, usuario, semana), 0) for i in df["ID_tarea"].tolist()]
+    en_proceso = (df["avance"] > 0) & (df["avance"] < 100)
+    df.loc[en_proceso, "etiqueta"] += " (Avance: " + df.loc[en_proceso, "avance"].astype(str) + "%)"
+    return df
+
+
+class ParticionesEstado:
+    """Historial de estado_tareas tipado y separado por semana ISO (``ClaveSemana``).
+
+    La vista de la semana actual lee solo su partición y un rango de fechas junta solo
+    las particiones que lo cruzan, así que el costo no crece con los años de historia.
+    Cuando la hoja solo creció por el final (lo normal: cada registro agrega una fila),
+    ``actualizar`` tipa solo las filas nuevas y rehace solo las particiones que tocan.
+
+    Junto a cada partición se mantiene su parte del cubo de aportes: cuántos registros
+    hay por ``(Tema, Usuario, Tramo)`` en esa semana (ver ``conteo_aportes``). Las filas
+    nuevas solo suman a las celdas de sus semanas, y un reporte de N semanas lee N
+    series chicas en vez de todos los registros (ver ``aportes``).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (particiones, claves ordenadas, DataFrame vacío con las columnas, cubo) en una sola tupla
+        self._datos = ({}, [], normalizar_estado(pd.DataFrame()), {})
+        self.version = None
+        # Si ID_tarea viene de la hoja o es el crc32 (ver ids_de_hoja)
+        self.usar_id = True
+        self._columnas = None
+        self._filas = 0
+        self._ultima = None
+
+    def actualizar(self, df_crudo, version=None, completa=True, usar_id=True):
+        """Incorpora la hoja cruda si cambió de versión (o de ``usar_id``, ver ``ids_tarea``).
+
+        Con ``completa=False`` (la hoja se actualizó agregando filas) y si la última fila
+        ya conocida sigue en su lugar, solo se procesan las filas posteriores.
+        """
+        with self._lock:
+            if version is not None and version == self.version and usar_id == self.usar_id:
+                return self
+            columnas = list(df_crudo.columns)
+            crece = (
+                not completa and usar_id == self.usar_id and self._columnas == columnas
+                and 0 < self._filas <= len(df_crudo)
+                and tuple(df_crudo.iloc[self._filas - 1]) == self._ultima
+            )
+            if crece:
+                nuevas = normalizar_estado(df_crudo.iloc[self._filas:], usar_id)
+                particiones = _unificar_categorias(self._datos[2], nuevas, dict(self._datos[0]))
+                cubo = dict(self._datos[3])
+            else:
+                nuevas = normalizar_estado(df_crudo, usar_id)
+                particiones, cubo = {}, {}
+            for clave, parte in nuevas.groupby("ClaveSemana", sort=False):
+                previa = particiones.get(int(clave))
+                if previa is not None:
+                    parte = pd.concat([previa, parte]).sort_index(kind="stable")
+                particiones[int(clave)] = parte
+            for clave, conteo in conteo_aportes(nuevas).groupby(level="ClaveSemana", sort=False):
+                conteo = conteo.droplevel("ClaveSemana")
+                previo = cubo.get(int(clave))
+                cubo[int(clave)] = conteo if previo is None else previo.add(conteo, fill_value=0).astype(int)
+            # Se reemplaza todo de una vez: las sesiones que están leyendo no ven un estado a medias
+            self._datos = (particiones, sorted(particiones), nuevas.iloc[0:0], cubo)
+            self.version = version
+            self.usar_id = usar_id
+            self._columnas = columnas
+            self._filas = len(df_crudo)
+            self._ultima = tuple(df_crudo.iloc[-1]) if len(df_crudo) else None
+            return self
+
+    @property
+    def claves(self):
+        return self._datos[1]
+
+    @property
+    def columnas(self):
+        """Encabezado de la hoja cruda (None si todavía no se cargó)."""
+        return self._columnas
+
+    def semana(self, fecha):
+        """Registros de la semana ISO de ``fecha`` (solo su partición)."""
+        particiones, _, vacio, _ = self._datos
+        return particiones.get(clave_semana(fecha), vacio)
+
+    def rango(self, inicio, fin):
+        """Registros con fecha en ``[inicio, fin]``, leyendo solo las particiones que lo cruzan."""
+        particiones, claves, vacio, _ = self._datos
+        desde = bisect.bisect_left(claves, clave_semana(inicio))
+        hasta = bisect.bisect_right(claves, clave_semana(fin))
+        partes = [particiones[c] for c in claves[desde:hasta]]
+        if not partes:
+            return vacio
+        return filtrar_rango(partes[0] if len(partes) == 1 else pd.concat(partes), inicio, fin)
+
+    def aportes(self, inicio, fin):
+        """Cubo de aportes de las semanas ISO de ``inicio`` a ``fin`` (semanas completas).
+
+        DataFrame largo con ``ClaveSemana``, ``Tema``, ``Usuario``, ``Tramo`` y
+        ``Registros``; solo están las celdas con algún registro.
+        """
+        _, claves, _, cubo = self._datos
+        desde = bisect.bisect_left(claves, clave_semana(inicio))
+        hasta = bisect.bisect_right(claves, clave_semana(fin))
+        partes = {c: cubo[c] for c in claves[desde:hasta]}
+        if not partes:
+            return pd.DataFrame(columns=["ClaveSemana", "Tema", "Usuario", "Tramo", "Registros"])
+        return pd.concat(partes, names=["ClaveSemana"]).rename("Registros").reset_index()
+
+    def __len__(self):
+        return sum(len(p) for p in self._datos[0].values())
+
+
+def _unificar_categorias(referencia, nuevas, particiones):
+    """Deja ``nuevas`` con las categorías de ``referencia`` para que ``pd.concat`` conserve
+    el tipo categórico. Si aparece un valor nuevo (otra persona, otro tema) se amplían
+    las categorías también en las particiones existentes, que es lo poco frecuente."""
+    for col in CATEGORICAS_ESTADO:
+        tipo = referencia[col].dtype
+        if not isinstance(tipo, pd.CategoricalDtype):
+            continue
+        faltan = sorted(set(nuevas[col].cat.categories) - set(tipo.categories))
+        if faltan:
+            tipo = pd.CategoricalDtype(list(tipo.categories) + faltan)
+            particiones = {c: p.assign(**{col: p[col].astype(tipo)}) for c, p in particiones.items()}
+        nuevas[col] = nuevas[col].astype(tipo)
+    return particiones
+
+
+def _conteo_por_tema(df):
+    # value_counts sobre los códigos de la categoría; sin los temas que no aparecen
+    conteo = df["Tema"].value_counts(sort=False)
+    conteo = conteo[conteo > 0]
+    conteo.index = conteo.index.astype(str)
+    return conteo.sort_index()
+
+
+def resumen_por_tema(completadas, df_tareas):
+    """Registros y total de tareas por tema, con ``% completado`` numérico."""
+    resumen = pd.DataFrame({
+        "Completadas": _conteo_por_tema(completadas),
+        "Total": _conteo_por_tema(df_tareas),
+    }).fillna(0).astype(int)
+    resumen.index.name = "Tema"
+    resumen["% completado"] = (resumen["Completadas"] / resumen["Total"] * 100).round(1)
+    return resumen
+
+
+def aportes_por_semana(aportes, semanas, usuario=None):
+    """Registros por semana (filas, todas las de ``semanas``) y tramo (columnas) de
+    ``usuario`` o de todas las personas, a partir de ``ParticionesEstado.aportes``."""
+    if usuario is not None:
+        aportes = aportes[aportes["Usuario"] == usuario]
+    tabla = aportes.groupby(["ClaveSemana", "Tramo"])["Registros"].sum().unstack()
+    tabla = tabla.reindex(index=semanas, columns=TRAMOS[:2]).fillna(0).astype(int)
+    tabla.index = pd.Index([etiqueta_semana(c) for c in tabla.index], name="Semana")
+    return tabla
+
+
+def tasa_por_tema(aportes, df_tareas, semanas):
+    """% de tareas completadas por semana (filas) y tema (columnas): registros al 100%
+    sobre el total de tareas del tema, como en ``resumen_por_tema``."""
+    completas = aportes[aportes["Tramo"] == TRAMOS[0]]
+    tabla = completas.groupby(["ClaveSemana", "Tema"])["Registros"].sum().unstack()
+    total = _conteo_por_tema(df_tareas)
+    tabla = tabla.reindex(index=semanas, columns=total.index).fillna(0)
+    tabla = (tabla / total * 100).round(1)
+    tabla.index = pd.Index([etiqueta_semana(c) for c in tabla.index], name="Semana")
+    return tabla
+
+
+def reporte_aucane(completadas, df_tareas, aucane):
+    """Registros de ``aucane`` (más recientes primero), su porcentaje sobre el total de
+    tareas y cuántas tareas hizo por tema."""
+    registros = completadas[completadas["Usuario"] == aucane].sort_values("Fecha", ascending=False)
+    total = len(df_tareas)
+    porcentaje = round((len(registros) / total) * 100, 1) if total > 0 else 0
+    por_tema = registros.groupby("Tema", observed=True)["Tarea"].count().reset_index().rename(columns={"Tarea": "Tareas completadas"})
+    return registros, porcentaje, por_tema
@@ -0,0 +1,63 @@
+"""``TextosBusqueda`` debe dar lo mismo que revisar todas las filas una por una."""
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import busqueda  # noqa: E402
+
+# Alfabeto chico para que abunden las coincidencias aproximadas
+LETRAS = "aeiorsnt "
+
+
+def _filas(rnd, n):
+    return [
+        tuple("".join(rnd.choice(LETRAS) for _ in range(rnd.randint(0, 14))) for _ in range(2))
+        for _ in range(n)
+    ]
+
+
+def _consultas(rnd, n):
+    return ["".join(rnd.choice(LETRAS.strip()) for _ in range(rnd.randint(2, 10))) for _ in range(n)]
+
+
+def _puntaje(fila, ql):
+    return max(busqueda._puntaje_texto(t, ql) for t in fila)
+
+
+def test_coincidencia_aproximada_corta():
+    assert busqueda._approx_contains_text("ro", "rio")
+    assert busqueda.TextosBusqueda([("ro",), ("rio grande",)]).buscar("rio") == [0, 1]
+
+
+def test_permitidas_y_desempate():
+    textos = busqueda.TextosBusqueda([("rio",), ("rio",), ("ro",), ("nada",)])
+    assert textos.buscar("rio", permitidas=[False, True, True, True]) == [1, 2]
+    assert textos.mejores("rio", 2, desempate=[5, 1, 0, 0]) == [(1, 1.0), (0, 1.0)]
+    assert [i for i, _ in textos.mejores("rio", 3, permitidas=[True, False, True, True])] == [0, 2]
+
+
+@pytest.mark.parametrize("semilla", range(5))
+def test_buscar_igual_a_revisar_todo(semilla):
+    rnd = random.Random(semilla)
+    filas = _filas(rnd, 200)
+    textos = busqueda.TextosBusqueda(filas)
+    for ql in _consultas(rnd, 30):
+        esperado = [i for i, fila in enumerate(filas) if any(busqueda._approx_contains_text(t, ql) for t in fila)]
+        assert textos.buscar(ql) == esperado, ql
+
+
+@pytest.mark.parametrize("semilla", range(5))
+def test_mejores_igual_a_revisar_todo(semilla):
+    rnd = random.Random(semilla)
+    filas = _filas(rnd, 200)
+    textos = busqueda.TextosBusqueda(filas)
+    for ql in _consultas(rnd, 30):
+        puntajes = [(i, _puntaje(fila, ql)) for i, fila in enumerate(filas)]
+        ordenados = sorted(((i, p) for i, p in puntajes if p > 0), key=lambda x: (-x[1], x[0]))
+        for k in (1, 5, len(filas)):
+            obtenido = [(int(i), p) for i, p in textos.mejores(ql, k)]
+            assert obtenido == ordenados[:k], (ql, k)
@@ -0,0 +1,122 @@
+"""Caché de hojas (TTL, LRU y generaciones) y descargas de a una por clave."""
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import datos  # noqa: E402
+
+
+def _df(n=3):
+    return pd.DataFrame({"a": range(n)})
+
+
+def test_ttl_vencida_y_renovar():
+    cache = datos.CacheHojas(ttl=5)
+    clave = cache.clave("h")
+    cache.guardar(clave, _df(), obtenido=time.monotonic() - 10)
+    # Vencida por tiempo: no se sirve, pero sigue para revalidar o leer la cola
+    assert cache.obtener(clave) is None
+    assert cache.anterior(clave) is not None
+    assert cache.vencida(clave) is not None
+    assert cache.renovar(clave) is not None
+    assert cache.obtener(clave) is not None
+    # Marcada con vencer: ya no sirve ni siquiera como vencida
+    cache.vencer("h")
+    assert cache.obtener(clave) is None
+    assert cache.vencida(clave) is None
+    assert (cache.aciertos, cache.fallos) == (1, 2)
+
+
+def test_lru_por_entradas_y_por_memoria():
+    cache = datos.CacheHojas(max_entradas=2)
+    for hoja in "ab":
+        cache.guardar(cache.clave(hoja), _df())
+    cache.obtener(cache.clave("a"))
+    cache.guardar(cache.clave("c"), _df())
+    assert cache.anterior(cache.clave("b")) is None
+    assert cache.anterior(cache.clave("a")) is not None
+    assert cache.expulsiones == 1
+
+    chica = datos.CacheHojas(max_bytes=datos._bytes(_df(100)) + 1)
+    chica.guardar(chica.clave("a"), _df(100))
+    chica.guardar(chica.clave("b"), _df(100))
+    assert chica.anterior(chica.clave("a")) is None
+    # La nueva siempre queda, aunque sola ya pase el límite
+    chica.guardar(chica.clave("c"), _df(1000))
+    assert chica.anterior(chica.clave("c")) is not None
+    assert chica.estadisticas()["entradas"] == 1
+
+
+def test_generaciones_y_versiones():
+    cache = datos.CacheHojas()
+    assert cache.version_datos("h") is None
+    cache.guardar(cache.clave("h"), _df())
+    primera = cache.version_datos("h")
+    cache.renovar(cache.clave("h"))
+    assert cache.version_datos("h") == primera
+    cache.guardar(cache.clave("h"), _df(4))
+    segunda = cache.version_datos("h")
+    assert segunda[0] == primera[0] and segunda[1] > primera[1]
+
+    clave = cache.clave("h")
+    cache.invalidar("h")
+    assert cache.clave("h") != clave
+    assert cache.anterior(clave) is None and cache.version_datos("h") is None
+    cache.guardar(cache.clave("h"), _df())
+    assert cache.version_datos("h")[0] == clave[1] + 1
+
+
+def _concurrentes(vuelos, n, funcion):
+    """Corre ``vuelos.hacer`` en ``n`` hilos; devuelve sus resultados (o errores)."""
+    resultados = [None] * n
+
+    def _hilo(i):
+        try:
+            resultados[i] = vuelos.hacer(("h", 0), funcion)
+        except Exception as e:
+            resultados[i] = e
+
+    hilos = [threading.Thread(target=_hilo, args=(i,)) for i in range(n)]
+    for hilo in hilos:
+        hilo.start()
+    return hilos, resultados
+
+
+def _esperar_coalescidas(vuelos, n):
+    limite = time.monotonic() + 10
+    while vuelos.estadisticas()["coalescidas"] < n:
+        assert time.monotonic() < limite, "los hilos no llegaron a esperar la descarga"
+        time.sleep(0.01)
+
+
+@pytest.mark.parametrize("falla", [False, True])
+def test_una_sola_descarga_concurrente(falla):
+    vuelos = datos.VuelosEnCurso()
+    liberar = threading.Event()
+    llamadas = []
+
+    def _descargar():
+        llamadas.append(1)
+        liberar.wait(10)
+        if falla:
+            raise OSError("sin conexión")
+        return object()
+
+    hilos, resultados = _concurrentes(vuelos, 8, _descargar)
+    _esperar_coalescidas(vuelos, 7)
+    liberar.set()
+    for hilo in hilos:
+        hilo.join(10)
+    assert len(llamadas) == 1
+    assert len({id(r) for r in resultados}) == 1
+    assert isinstance(resultados[0], OSError) == falla
+    assert vuelos.estadisticas() == {"descargas": 1, "coalescidas": 7, "tasa_coalescidas": 0.875, "en_curso": 0}
+    # Terminada la descarga, la próxima vuelve a llamar a la función
+    vuelos.hacer(("h", 0), lambda: llamadas.append(1))
+    assert len(llamadas) == 2
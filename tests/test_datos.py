@@ -0,0 +1,213 @@
+"""Lectura incremental, copias locales y escrituras optimistas contra ``BackendLocal``."""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+import pytest
+import requests
+from gspread.exceptions import APIError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import datos  # noqa: E402
+from almacen import AlmacenSnapshots  # noqa: E402
+
+HOJA = "estado_tareas"
+ENCABEZADO = ["Fecha", "Usuario", "Tema", "Zona", "Tarea", "Completada", "Porcentaje", "Observaciones"]
+
+
+def _fila(usuario, porcentaje=100):
+    return ["2024-05-06 10:00", usuario, "Cocina", "Cocina", "Barrer", "Sí", porcentaje, ""]
+
+
+class _Backend(datos.BackendLocal):
+    """BackendLocal que anota los rangos pedidos."""
+
+    def __init__(self, hojas):
+        super().__init__(hojas)
+        self.rangos = []
+
+    def valores(self, rangos):
+        self.rangos.append(list(rangos))
+        return super().valores(rangos)
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    backend = _Backend({HOJA: [ENCABEZADO, _fila("Ana"), _fila("Beto", 50)]})
+    monkeypatch.setattr(datos, "backend", backend)
+    monkeypatch.setattr(datos, "cache", datos.CacheHojas())
+    monkeypatch.setattr(datos, "almacen", AlmacenSnapshots(str(tmp_path / "snapshots.sqlite")))
+    monkeypatch.setattr(datos, "refrescador", datos.Refrescador({}))
+    monkeypatch.setattr(datos, "DIR_LOCAL", str(tmp_path))
+    monkeypatch.setattr(datos, "USAR_SNAPSHOTS", True)
+    monkeypatch.setattr(datos, "_sin_firmas", False)
+    for nombre, valor in (("_descargadas", set()), ("_colas_revisadas", set()), ("_colas", {}), ("_optimistas", {})):
+        monkeypatch.setattr(datos, nombre, valor)
+    return backend
+
+
+def _leer():
+    return datos.cargar_hoja(HOJA)
+
+
+def _usuarios(df):
+    return list(df["Usuario"])
+
+
+def _cola_retenida():
+    """Cola de la hoja que no envía hasta que se libera el evento devuelto."""
+    liberar = threading.Event()
+
+    def _enviar(filas):
+        liberar.wait(10)
+        datos.agregar_filas(HOJA, filas)
+
+    return _cola(_enviar), liberar
+
+
+def _cola(enviar):
+    datos._colas[HOJA] = datos.ColaEscritura(HOJA, datos._ruta_cola(HOJA), enviar=enviar, espera_lote=0)
+    return datos._colas[HOJA]
+
+
+def _vencida():
+    """True cuando la cola ya terminó con el lote: olvidó las optimistas y venció la copia."""
+    return datos.cache.vencida(datos.cache.clave(HOJA)) is None
+
+
+def _esperar(condicion):
+    limite = time.monotonic() + 10
+    while not condicion():
+        assert time.monotonic() < limite
+        time.sleep(0.01)
+
+
+def test_incremental_con_fila_ajena(backend):
+    assert _usuarios(_leer()) == ["Ana", "Beto"]
+    # Otra instancia de la app agrega una fila; esta se entera al vencer la copia
+    backend.agregar_filas(HOJA, [_fila("Caro")])
+    datos.cache.vencer(HOJA)
+    backend.rangos.clear()
+    assert _usuarios(_leer()) == ["Ana", "Beto", "Caro"]
+    # Solo se pidió el encabezado y la cola desde la última fila conocida
+    assert backend.rangos == [[f"'{HOJA}'!1:1", f"'{HOJA}'!A3:H"]]
+    meta = datos.meta_hoja(HOJA)
+    assert (meta["filas"], meta["incrementales"]) == (3, 1)
+
+
+def test_incremental_con_fila_editada_recarga_entera(backend):
+    _leer()
+    backend._hojas[HOJA][-1][1] = "Beatriz"
+    datos.cache.vencer(HOJA)
+    backend.rangos.clear()
+    assert _usuarios(_leer()) == ["Ana", "Beatriz"]
+    assert backend.rangos[-1] == [f"'{HOJA}'"]
+    assert datos.meta_hoja(HOJA)["incrementales"] == 0
+
+
+def test_optimista_con_fila_ajena_intercalada(backend):
+    _leer()
+    cola, liberar = _cola_retenida()
+    id_fila = datos.registrar_fila(HOJA, _fila("Propia"))
+    assert _usuarios(_leer()) == ["Ana", "Beto", "Propia"]
+    # Una fila ajena llega a la hoja antes que la propia: la optimista sigue al final
+    backend.agregar_filas(HOJA, [_fila("Ajena")])
+    datos.cache.vencer(HOJA)
+    assert _usuarios(_leer()) == ["Ana", "Beto", "Ajena", "Propia"]
+    # Confirmada, se lee de la hoja y no queda repetida
+    liberar.set()
+    _esperar(lambda: cola.estado(id_fila) == cola.CONFIRMADO and _vencida())
+    df = _leer()
+    assert _usuarios(df) == ["Ana", "Beto", "Ajena", "Propia"]
+    assert not datos._optimistas[HOJA]
+    meta = datos.meta_hoja(HOJA)
+    assert (meta["filas"], meta["optimistas"]) == (4, 0)
+    # La copia en caché es igual a una descarga completa
+    datos.cache.invalidar(HOJA)
+    pd.testing.assert_frame_equal(_leer(), df)
+
+
+def test_optimista_con_error_permanente_se_descarta(backend):
+    _leer()
+
+    def _enviar(filas):
+        raise ValueError("rango inválido")
+
+    cola = _cola(_enviar)
+    id_fila = datos.registrar_fila(HOJA, _fila("Propia"))
+    _esperar(lambda: cola.estado(id_fila) == cola.ERROR and _vencida())
+    assert _usuarios(_leer()) == ["Ana", "Beto"]
+
+
+def test_optimista_no_queda_si_encolar_falla(backend, monkeypatch):
+    _leer()
+    cola = _cola(lambda filas: None)
+
+    def _encolar(fila, id_fila=None):
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(cola, "encolar", _encolar)
+    with pytest.raises(OSError):
+        datos.registrar_fila(HOJA, _fila("Propia"))
+    assert _usuarios(_leer()) == ["Ana", "Beto"]
+    assert not datos._optimistas.get(HOJA)
+
+
+def test_snapshot_con_filas_agregadas(backend):
+    _leer()
+    backend.agregar_filas(HOJA, [_fila("Caro", 30)])
+    datos.cache.vencer(HOJA)
+    df = _leer()
+    copia, meta, _ = datos.almacen.leer(HOJA)
+    pd.testing.assert_frame_equal(copia, df)
+    assert meta == {k: v for k, v in datos.meta_hoja(HOJA).items() if k != "optimistas"}
+
+
+def test_snapshot_ida_y_vuelta(tmp_path):
+    almacen = AlmacenSnapshots(str(tmp_path / "s.sqlite"))
+    assert almacen.leer("h") is None
+    df = pd.DataFrame({"a": [1, "x", 2.5], "b": ["", "ñandú", "3"]})
+    almacen.guardar("h", df, {"filas": 3}, obtenido=123.0)
+    copia, meta, obtenido = almacen.leer("h")
+    pd.testing.assert_frame_equal(copia, df)
+    assert (meta, obtenido) == ({"filas": 3}, 123.0)
+    # Solo se agrega si la copia tiene las filas esperadas
+    assert not almacen.agregar("h", df.iloc[:1], {"filas": 4}, previas=2)
+    assert almacen.agregar("h", df.iloc[:1], {"filas": 4}, previas=3)
+    copia, meta, _ = almacen.leer("h")
+    pd.testing.assert_frame_equal(copia, pd.concat([df, df.iloc[:1]], ignore_index=True))
+    assert meta == {"filas": 4}
+    # Guardar de nuevo reemplaza también lo agregado
+    almacen.guardar("h", df.iloc[:2])
+    pd.testing.assert_frame_equal(almacen.leer("h")[0], df.iloc[:2])
+
+
+def _error_api(codigo):
+    respuesta = requests.Response()
+    respuesta.status_code = codigo
+    respuesta._content = json.dumps({"error": {"code": codigo, "message": "Drive API disabled"}}).encode()
+    return APIError(respuesta)
+
+
+def test_firma_con_permiso_denegado_se_deja_de_consultar(backend, monkeypatch, caplog):
+    consultas = []
+
+    def _firmas(sheet_names):
+        consultas.append(sheet_names)
+        raise _error_api(403)
+
+    monkeypatch.setattr(backend, "firmas", _firmas)
+    _leer()
+    backend.agregar_filas(HOJA, [_fila("Caro")])
+    with caplog.at_level(logging.WARNING, logger="datos"):
+        for _ in range(3):
+            # Vencida por tiempo (no con vencer): sin firma se vuelve a leer igual
+            datos.cache.renovar(datos.cache.clave(HOJA)).obtenido -= 2 * datos.cache.ttl
+            assert _usuarios(_leer()) == ["Ana", "Beto", "Caro"]
+    assert len(consultas) == 1
+    assert len(caplog.records) == 1
@@ -0,0 +1,172 @@
+"""IDs de tarea, filas registradas y particiones por semana de estado_tareas."""
+import datetime
+import os
+import random
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import esquemas  # noqa: E402
+import tareas  # noqa: E402
+
+
+def _catalogo(con_id):
+    df = pd.DataFrame({"Tema": ["Cocina", "Huerta"], "Zona": ["Cocina", "Huerta "], "Tarea": ["Barrer", "Regar"]})
+    if con_id:
+        df[" ID_tarea "] = [1, 2]
+    return df
+
+
+def _estado(con_id):
+    df = pd.DataFrame({
+        "Fecha": ["2024-05-06 10:00", "2024-05-07 11:00"],
+        "Usuario": ["Ana", "Beto"],
+        "Tema": ["Cocina", "Huerta"],
+        "Zona": ["Cocina", "Huerta"],
+        "Tarea": ["Barrer", "Regar"],
+        "Completada": ["Sí", "En proceso"],
+        "Porcentaje": ["100", "50"],
+        "Observaciones": ["", ""],
+    })
+    if con_id:
+        df["ID_tarea"] = [1, 2]
+    return df
+
+
+def _todo(particiones):
+    return particiones.rango(datetime.datetime(2024, 1, 1), datetime.datetime(2024, 12, 31))
+
+
+def _ids(df_tareas, df_estado):
+    usar_id = tareas.ids_de_hoja(df_tareas.columns, df_estado.columns)
+    catalogo = esquemas.normalizar("tareas_semaneros", df_tareas)
+    if not usar_id:
+        catalogo = catalogo.assign(ID_tarea=tareas.ids_tarea(catalogo, usar_id=False))
+    estado = _todo(tareas.ParticionesEstado().actualizar(df_estado, "v1", usar_id=usar_id))
+    return list(catalogo["ID_tarea"]), sorted(estado["ID_tarea"])
+
+
+def test_ids_de_la_hoja_con_columna_en_ambas():
+    assert _ids(_catalogo(True), _estado(True)) == ([1, 2], [1, 2])
+
+
+def test_migracion_a_medias_usa_crc32():
+    # Solo una de las dos hojas tiene ID_tarea: ambas caen al crc32 de Zona+Tarea
+    for con_tareas, con_estado in ((False, True), (True, False)):
+        catalogo, estado = _ids(_catalogo(con_tareas), _estado(con_estado))
+        assert sorted(catalogo) == estado
+        assert 1 not in catalogo
+
+
+def test_cambiar_usar_id_reconstruye():
+    particiones = tareas.ParticionesEstado()
+    particiones.actualizar(_estado(True), "v1")
+    particiones.actualizar(_estado(True), "v1", usar_id=False)
+    assert 1 not in set(_todo(particiones)["ID_tarea"])
+
+
+def test_fila_registro_con_encabezado_con_espacios():
+    registro = {col: col.lower() for col in tareas.COLUMNAS_ESTADO}
+    registro["ID_tarea"] = 7
+    columnas = [" ID_tarea", "Fecha ", "Usuario", "Tarea", "Zona", "Tema", "Porcentaje",
+                "Completada", "Observaciones", "Extra"]
+    assert tareas.fila_registro(registro, columnas) == [
+        7, "fecha", "usuario", "tarea", "zona", "tema", "porcentaje", "completada", "observaciones", ""]
+
+
+def test_fila_registro_sin_id_tarea():
+    registro = {col: col for col in tareas.COLUMNAS_ESTADO}
+    registro["ID_tarea"] = 7
+    assert tareas.fila_registro(registro, ["Fecha", "Usuario"]) == list(tareas.COLUMNAS_ESTADO)
+
+
+def _estado_aleatorio(rnd, n):
+    """Registros crudos (texto, como los entrega la hoja) en unas 10 semanas, con fechas
+    fuera de orden, porcentajes vacíos, alguna fecha ilegible y personas que aparecen tarde."""
+    inicio = datetime.datetime(2024, 12, 2)
+    filas = []
+    for i in range(n):
+        fecha = inicio + datetime.timedelta(hours=rnd.randint(0, 70 * 24))
+        usuarios = ["Ana", "Beto"] + (["Caro"] if i > n // 2 else [])
+        filas.append({
+            "Fecha": fecha.strftime(tareas.FORMATO_FECHA) if rnd.random() > 0.02 else "ayer",
+            "Usuario": rnd.choice(usuarios),
+            "Tema": rnd.choice(["Cocina", "Huerta", "Baños"]),
+            "Zona": rnd.choice(["Z1", "Z2"]),
+            "Tarea": rnd.choice(["Barrer", "Regar"]),
+            "Completada": "",
+            "Porcentaje": rnd.choice(["100", "50", "", "0", 100]),
+            "Observaciones": "",
+        })
+    return pd.DataFrame(filas, columns=tareas.COLUMNAS_ESTADO)
+
+
+def _sin_categorias(df):
+    # Las categorías pueden quedar en otro orden al crecer; se comparan los valores
+    return df.astype({col: str for col in tareas.CATEGORICAS_ESTADO})
+
+
+def _cubo(particiones):
+    aportes = particiones.aportes(datetime.datetime(2024, 1, 1), datetime.datetime(2025, 12, 31))
+    return aportes.sort_values(["ClaveSemana", "Tema", "Usuario", "Tramo"]).reset_index(drop=True)
+
+
+def _igual_a_reconstruir(particiones, df_crudo):
+    completa = tareas.ParticionesEstado().actualizar(df_crudo, "completa")
+    assert particiones.claves == completa.claves
+    for clave in completa.claves:
+        pd.testing.assert_frame_equal(_sin_categorias(particiones._datos[0][clave]),
+                                      _sin_categorias(completa._datos[0][clave]))
+    pd.testing.assert_frame_equal(_cubo(particiones), _cubo(completa), check_dtype=False)
+    assert len(particiones) == len(completa)
+
+
+@pytest.mark.parametrize("semilla", range(5))
+def test_particiones_al_crecer_igual_que_reconstruir(semilla, monkeypatch):
+    rnd = random.Random(semilla)
+    df_crudo = _estado_aleatorio(rnd, 300)
+    tipadas = []
+    normalizar = tareas.normalizar_estado
+
+    def _contar(df, usar_id=True):
+        tipadas.append(len(df))
+        return normalizar(df, usar_id)
+
+    monkeypatch.setattr(tareas, "normalizar_estado", _contar)
+
+    particiones = tareas.ParticionesEstado()
+    cortes = sorted(rnd.sample(range(1, 300), 6)) + [300]
+    particiones.actualizar(df_crudo.iloc[:cortes[0]], 0)
+    total = tipadas[-1]
+    for version, hasta in enumerate(cortes[1:], 1):
+        tipadas.clear()
+        particiones.actualizar(df_crudo.iloc[:hasta], version, completa=False)
+        total += sum(tipadas)
+        _igual_a_reconstruir(particiones, df_crudo.iloc[:hasta])
+    # Al crecer solo se tipan las filas nuevas: cada fila una sola vez
+    assert total == 300
+
+
+def test_particiones_de_estado_vacio():
+    particiones = tareas.ParticionesEstado().actualizar(pd.DataFrame(columns=tareas.COLUMNAS_ESTADO), 0)
+    assert len(particiones) == 0 and particiones.claves == []
+    hoy = datetime.datetime(2025, 1, 8)
+    assert particiones.semana(hoy).empty and "ClaveSemana" in particiones.semana(hoy).columns
+    assert particiones.rango(hoy, hoy).empty
+    assert particiones.aportes(hoy, hoy).empty
+    # De vacía a con filas (la hoja solo creció) da lo mismo que reconstruir
+    df_crudo = _estado_aleatorio(random.Random(0), 20)
+    particiones.actualizar(df_crudo, 1, completa=False)
+    _igual_a_reconstruir(particiones, df_crudo)
+
+
+def test_porcentaje_vacio_cuenta_sin_avance():
+    df_crudo = _estado(False)
+    df_crudo["Porcentaje"] = ["", "50"]
+    particiones = tareas.ParticionesEstado().actualizar(df_crudo, 0)
+    assert list(_todo(particiones)["Porcentaje"]) == [0, 50]
+    cubo = _cubo(particiones)
+    assert dict(zip(cubo["Tramo"], cubo["Registros"])) == {"sin_avance": 1, "en_proceso": 1}
@@ -0,0 +1,140 @@
+"""Tiempos por etapa de cada recarga de la app (descarga, parseo, filtros, dibujo...).
+
+Apagado por defecto: mientras no se active, ``tramo()`` devuelve siempre el mismo
+contexto vacío y no se mide nada. Se activa con ``AUCCA_TIEMPOS=1`` o desde el panel de
+administración (``?admin=<AUCCA_ADMIN>`` en la URL). Cada recarga medida queda en memoria
+(las últimas ``MAX_RECARGAS``) y se agrega como una línea JSON a ``ARCHIVO``; al pasar de
+``ARCHIVO_MAX_MB`` el archivo se renombra a ``ARCHIVO.1`` (se conserva solo ese).
+
+Solo usa la biblioteca estándar, para poder importarlo también desde la portada.
+"""
+import collections
+import contextlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+_log = logging.getLogger(__name__)
+
+ACTIVO = os.environ.get("AUCCA_TIEMPOS", "0") not in ("", "0")
+MAX_RECARGAS = int(os.environ.get("AUCCA_TIEMPOS_MAX", 500))
+ARCHIVO = os.environ.get(
+    "AUCCA_TIEMPOS_ARCHIVO",
+    os.path.join(os.environ.get("AUCCA_DIR_LOCAL", ".aucca_local"), "tiempos.jsonl"),
+)
+ARCHIVO_MAX_MB = float(os.environ.get("AUCCA_TIEMPOS_ARCHIVO_MAX_MB", 5))
+
+_SIN_MEDIR = contextlib.nullcontext()
+_local = threading.local()
+_lock = threading.Lock()
+recargas = collections.deque(maxlen=MAX_RECARGAS)
+
+
+class _Tramo:
+    __slots__ = ("tramos", "nombre", "inicio")
+
+    def __init__(self, tramos, nombre):
+        self.tramos = tramos
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        # Un mismo tramo puede repetirse en la recarga (p.ej. una hoja por vez): se suma
+        self.tramos[self.nombre] = self.tramos.get(self.nombre, 0.0) + time.perf_counter() - self.inicio
+
+
+def activar(activo=True):
+    global ACTIVO
+    ACTIVO = activo
+
+
+def iniciar(seccion=""):
+    """Comienza a medir la recarga del hilo actual (si la medición está activa)."""
+    if ACTIVO:
+        _local.recarga = {"inicio": time.time(), "t0": time.perf_counter(), "seccion": seccion, "tramos": {}}
+    else:
+        _local.recarga = None
+
+
+def etiquetar(seccion):
+    recarga = getattr(_local, "recarga", None)
+    if recarga is not None:
+        recarga["seccion"] = seccion
+
+
+def tramo(nombre):
+    """``with tramo("busqueda"): ...`` suma el tiempo del bloque a la recarga en curso.
+
+    Fuera de una recarga medida (medición apagada, hilos en segundo plano o fragmentos
+    que se vuelven a ejecutar solos) no mide nada.
+    """
+    recarga = getattr(_local, "recarga", None)
+    if recarga is None:
+        return _SIN_MEDIR
+    return _Tramo(recarga["tramos"], nombre)
+
+
+def terminar():
+    """Cierra la recarga en curso, la guarda en memoria y la agrega a ``ARCHIVO``."""
+    recarga = getattr(_local, "recarga", None)
+    _local.recarga = None
+    if recarga is None:
+        return None
+    registro = {
+        "inicio": recarga["inicio"],
+        "seccion": recarga["seccion"],
+        "total": time.perf_counter() - recarga["t0"],
+        "tramos": recarga["tramos"],
+    }
+    with _lock:
+        recargas.append(registro)
+        try:
+            os.makedirs(os.path.dirname(ARCHIVO) or ".", exist_ok=True)
+            if os.path.exists(ARCHIVO) and os.path.getsize(ARCHIVO) > ARCHIVO_MAX_MB * 1024 * 1024:
+                os.replace(ARCHIVO, ARCHIVO + ".1")
+            with open(ARCHIVO, "a", encoding="utf-8") as f:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        except OSError:
+            _log.exception("No se pudieron exportar los tiempos a %s", ARCHIVO)
+    return registro
+
+
+def _percentil(valores, p):
+    """Percentil por rango más cercano de una lista ya ordenada."""
+    return valores[max(0, math.ceil(p * len(valores)) - 1)]
+
+
+def resumen(ultimas=50, seccion=None):
+    """p50 y p95 (en ms) de cada tramo y del total en las ``ultimas`` recargas medidas.
+
+    Devuelve una lista de filas ``{tramo, recargas, p50_ms, p95_ms}``, el total primero.
+    """
+    with _lock:
+        medidas = [r for r in recargas if seccion is None or r["seccion"] == seccion][-ultimas:]
+    por_tramo = collections.defaultdict(list)
+    for r in medidas:
+        por_tramo["total"].append(r["total"])
+        for nombre, segundos in r["tramos"].items():
+            por_tramo[nombre].append(segundos)
+    filas = []
+    for nombre, valores in por_tramo.items():
+        valores.sort()
+        filas.append({
+            "tramo": nombre,
+            "recargas": len(valores),
+            "p50_ms": round(_percentil(valores, 0.50) * 1000, 1),
+            "p95_ms": round(_percentil(valores, 0.95) * 1000, 1),
+        })
+    return filas
+
+
+def ultimas_recargas(n=20):
+    """Detalle de las ``n`` recargas más recientes (la última primero)."""
+    with _lock:
+        return list(recargas)[-n:][::-1]